@@ -0,0 +1,114 @@
+"""Registry of prepared aggregation queries that run server-side on the nodes."""
+import json
+import uuid
+from typing import Dict, List, Optional
+
+from nildb_api import QUERY_NAMESPACE
+
+
+class PreparedQuery:
+    """An aggregation pipeline declared in code, with "##name" placeholders for its variables."""
+
+    def __init__(self, name: str, pipeline: List[Dict], variables: Optional[Dict] = None):
+        self.name = name
+        self.pipeline = pipeline
+        self.variables = variables or {}
+
+    def payload(self, schema_id: str) -> Dict:
+        """Query definition for /api/v1/queries, with an id derived from its content."""
+        return {
+            "_id": str(uuid.uuid5(
+                QUERY_NAMESPACE,
+                json.dumps(["prepared", schema_id, self.name, self.pipeline, self.variables], sort_keys=True)
+            )),
+            "name": self.name,
+            "schema": schema_id,
+            "variables": self.variables,
+            "pipeline": self.pipeline
+        }
+
+
+# Number of records per service, largest first
+COUNT_BY_SERVICE = PreparedQuery("count_by_service", [
+    {"$group": {"_id": "$service", "count": {"$sum": 1}}},
+    {"$sort": {"count": -1}}
+])
+
+# Records created per UTC day since a given timestamp
+RECORDS_PER_DAY = PreparedQuery("records_per_day", [
+    {"$match": {"_created": {"$gte": "##since"}}},
+    {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$_created"}}, "count": {"$sum": 1}}},
+    {"$sort": {"_id": 1}}
+], variables={
+    "since": {"type": "date", "description": "Earliest _created timestamp to count"}
+})
+
+
+def sum_shares(field: str) -> PreparedQuery:
+    """Per-node total of a sum-shared numeric field; the totals are themselves shares of the sum."""
+    return PreparedQuery(f"sum_{field}", [
+        {"$group": {"_id": None, "total": {"$sum": f"${field}"}}}
+    ])
+
+
+class QueryRegistry:
+    """Prepared queries for one schema, created once per node and executed by name.
+
+    Aggregates over plaintext fields return the same result on every node, so run() asks
+    a single node; aggregates over secret-shared fields need run_all() and a decrypt step.
+    """
+
+    def __init__(self, nildb_api, schema_id: str):
+        self.nildb_api = nildb_api
+        self.schema_id = schema_id
+        self.queries: Dict[str, PreparedQuery] = {}
+        self._payloads: Dict[str, Dict] = {}
+
+    def register(self, query: PreparedQuery) -> PreparedQuery:
+        self.queries[query.name] = query
+        self._payloads[query.name] = query.payload(self.schema_id)
+        return query
+
+    def query_id(self, name: str) -> str:
+        return self._payloads[name]["_id"]
+
+    def run(self, name: str, variables: Optional[Dict] = None, node_name: Optional[str] = None) -> List[Dict]:
+        """Execute a registered query on one node (the first one by default)."""
+        node_name = node_name or next(iter(self.nildb_api.nodes))
+        payload = self._payloads[name]
+        # ids are deterministic, so a query registered before a restart or by another client is reused
+        self.nildb_api.ensure_query(node_name, payload)
+        return self.nildb_api.query_execute(node_name, payload["_id"], variables)
+
+    def run_all(self, name: str, variables: Optional[Dict] = None) -> Dict[str, List[Dict]]:
+        """Execute a registered query on every node (concurrently when the API supports fan-out)."""
+        if hasattr(self.nildb_api, "fan_out"):
+            return self.nildb_api.fan_out(lambda node_name: self.run(name, variables, node_name))
+        return {node_name: self.run(name, variables, node_name) for node_name in self.nildb_api.nodes}
+
+    def total(self, field: str, encryption) -> Optional[int]:
+        """Sum a sum-shared field across all records, decrypting only the per-node totals."""
+        name = f"sum_{field}"
+        if name not in self.queries:
+            self.register(sum_shares(field))
+        results = self.run_all(name)
+        if not any(results.values()):
+            return 0
+        if not all(results.values()):
+            # a missing node total would silently corrupt the sum
+            print(f"Could not total {field}: no result from {', '.join(n for n, rows in results.items() if not rows)}")
+            return None
+        totals = [rows[0]["total"] for rows in results.values()]
+        try:
+            return encryption.decrypt_total(totals)
+        except Exception as e:
+            print(f"Error combining {field} totals: {str(e)}")
+            return None
+
+
+def default_registry(nildb_api, schema_id: str) -> QueryRegistry:
+    """Registry with the dashboard's aggregates."""
+    registry = QueryRegistry(nildb_api, schema_id)
+    registry.register(COUNT_BY_SERVICE)
+    registry.register(RECORDS_PER_DAY)
+    return registry
@@ -0,0 +1,148 @@
+"""Microbenchmarks for DataEncryption: ops/sec, allocations and share sizes.
+
+    python3 bench_encryption.py                      # run and print results
+    python3 bench_encryption.py --save-baseline      # record bench_baselines/encryption.json
+    python3 bench_encryption.py --compare            # fail if slower/larger than the baseline
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from encryption import DataEncryption
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baselines", "encryption.json")
+
+PLAINTEXT_LENGTHS = [8, 64, 512, 4000]
+NODE_COUNTS = [2, 3, 5]
+OPERATIONS = {
+    "store": {"store": True},
+    "sum": {"sum": True},
+}
+
+# Allowed slowdown / growth relative to the baseline before --compare fails
+DEFAULT_TOLERANCE = 0.25
+
+
+def _plaintexts(operation: str, length: int, count: int, seed: int = 7) -> List:
+    rng = random.Random(seed)
+    if operation == "sum":
+        return [rng.randrange(0, 2 ** 31) for _ in range(count)]
+    alphabet = string.ascii_letters + string.digits + string.punctuation
+    return ["".join(rng.choice(alphabet) for _ in range(length)) for _ in range(count)]
+
+
+def _ops_per_sec(fn, inputs: List, repeats: int) -> float:
+    """Best-of-repeats throughput, to damp scheduler noise."""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for value in inputs:
+            fn(value)
+        best = min(best, time.perf_counter() - started)
+    return len(inputs) / best if best else 0.0
+
+
+def _allocations(fn, inputs: List) -> Dict:
+    """Blocks and bytes allocated per call, measured with tracemalloc."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for value in inputs:
+        fn(value)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    return {
+        "alloc_blocks_per_op": round(sum(max(stat.count_diff, 0) for stat in diff) / len(inputs), 2),
+        "alloc_bytes_per_op": round(sum(max(stat.size_diff, 0) for stat in diff) / len(inputs), 1),
+        "peak_bytes": peak
+    }
+
+
+def bench_case(operation: str, num_nodes: int, length: int, iterations: int, repeats: int) -> Dict:
+    encryption = DataEncryption(num_nodes, operations=OPERATIONS[operation])
+    plaintexts = _plaintexts(operation, length, iterations)
+    share_lists = [encryption.encrypt_password(value) for value in plaintexts]
+    share_bytes = [sum(len(json.dumps(share)) for share in shares) for shares in share_lists]
+
+    result = {
+        "operation": operation,
+        "nodes": num_nodes,
+        "plaintext_len": length,
+        "encrypt_ops_per_s": round(_ops_per_sec(encryption.encrypt_password, plaintexts, repeats), 1),
+        "decrypt_ops_per_s": round(_ops_per_sec(encryption.decrypt_password, share_lists, repeats), 1),
+        "share_bytes_per_record": round(sum(share_bytes) / len(share_bytes), 1),
+        "share_bytes_per_node": round(sum(share_bytes) / len(share_bytes) / num_nodes, 1),
+    }
+    result.update({f"encrypt_{k}": v for k, v in _allocations(encryption.encrypt_password, plaintexts).items()})
+    result.update({f"decrypt_{k}": v for k, v in _allocations(encryption.decrypt_password, share_lists).items()})
+    return result
+
+
+def run(iterations: int, repeats: int) -> List[Dict]:
+    results = []
+    for operation in OPERATIONS:
+        # numeric plaintexts have no meaningful length dimension
+        lengths = [0] if operation == "sum" else PLAINTEXT_LENGTHS
+        for num_nodes in NODE_COUNTS:
+            for length in lengths:
+                try:
+                    results.append(bench_case(operation, num_nodes, length, iterations, repeats))
+                except Exception as e:
+                    print(f"Skipping {operation}/{num_nodes} nodes/{length}: {str(e)}", file=sys.stderr)
+    return results
+
+
+def _key(result: Dict) -> str:
+    return f"{result['operation']}/{result['nodes']}/{result['plaintext_len']}"
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Describe every case that got slower or produced larger shares than the baseline."""
+    baseline_by_key = {_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        base = baseline_by_key.get(_key(result))
+        if base is None:
+            continue
+        for metric in ("encrypt_ops_per_s", "decrypt_ops_per_s"):
+            if result[metric] < base[metric] * (1 - tolerance):
+                regressions.append(f"{_key(result)} {metric}: {result[metric]} < baseline {base[metric]}")
+        if result["share_bytes_per_record"] > base["share_bytes_per_record"] * (1 + tolerance):
+            regressions.append(f"{_key(result)} share_bytes_per_record: "
+                               f"{result['share_bytes_per_record']} > baseline {base['share_bytes_per_record']}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark nilql encryption as used by DataEncryption")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results = run(args.iterations, args.repeats)
+    for result in results:
+        print(json.dumps(result))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline, "r") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
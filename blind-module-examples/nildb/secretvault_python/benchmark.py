@@ -0,0 +1,140 @@
+"""Throughput benchmark for upload_credentials/fetch_credentials against simulated nodes.
+
+Run from the app directory (config.py still reads .streamlit/secrets.toml, but every
+node is replaced by an in-process node_simulator.SimulatedNode, and the app's outbox,
+mirror and dedupe index are switched off so nothing touches live nodes or local state):
+
+    python3 benchmark.py --records 10000 --latency 0.02 --concurrency 32
+"""
+import argparse
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from config import NODE_CONFIG
+import main
+from bulk_import import ImportReport, share_batch, upload_node_payloads
+from generate_tokens import AuthContext
+from nildb_api import ConcurrentNilDBAPI
+from node_simulator import simulated_cluster
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def summarize(name: str, latencies: List[float], elapsed: float, items: int) -> Dict:
+    return {
+        "phase": name,
+        "items": items,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(items / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2)
+    }
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def run_upload(records: int, concurrency: int) -> Dict:
+    """Drive upload_credentials once per record from a pool of client threads."""
+    def upload(i):
+        return _timed(main.upload_credentials, f"user{i}", f"password-{i}-{uuid.uuid4()}", f"service{i % 100}",
+                      main.nildb_api)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(upload, range(records)))
+    elapsed = time.perf_counter() - started
+
+    summary = summarize("upload_credentials", [latency for _, latency in results], elapsed, records)
+    summary["failed"] = sum(1 for ok, _ in results if not ok)
+    return summary
+
+
+def run_bulk_load(records: int, batch_size: int) -> Dict:
+    """Seed the simulated nodes through the bulk upload path."""
+    node_names = list(main.nildb_api.nodes.keys())
+    report = ImportReport()
+    latencies = []
+    for start in range(0, records, batch_size):
+        batch = [
+            {"_id": str(uuid.uuid4()), "username": f"user{i}", "password": f"password-{i}", "service": f"service{i % 100}"}
+            for i in range(start, min(start + batch_size, records))
+        ]
+        columns = next(main.encryption.encrypt_many((record["password"] for record in batch), chunk_size=len(batch)))
+        _, latency = _timed(upload_node_payloads, main.nildb_api, main.SCHEMA_ID,
+                            share_batch(node_names, batch, columns), report)
+        latencies.append(latency)
+
+    summary = summarize("bulk_load", latencies, report.elapsed, report.uploaded)
+    summary["failed"] = report.failed
+    return summary
+
+
+def run_fetch(runs: int) -> Dict:
+    """Drive fetch_credentials over the whole collection."""
+    latencies, count = [], 0
+    started = time.perf_counter()
+    for _ in range(runs):
+        credentials, latency = _timed(main.fetch_credentials, None, None, main.nildb_api)
+        latencies.append(latency)
+        count = len(credentials)
+    summary = summarize("fetch_credentials", latencies, time.perf_counter() - started, runs)
+    summary["records_per_fetch"] = count
+    summary["records_per_s"] = round(count / percentile(latencies, 0.50), 1) if count else 0.0
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the credential manager against simulated nilDB nodes")
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--load", choices=["single", "bulk"], default="single",
+                        help="seed through upload_credentials (single) or the bulk uploader")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--fetch-runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added per request")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-payload-bytes", type=int, default=None)
+    args = parser.parse_args()
+
+    nodes, node_config = simulated_cluster(
+        list(NODE_CONFIG.keys()),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        max_payload_bytes=args.max_payload_bytes
+    )
+    # Outside a Streamlit session there is no session auth, so bind the simulated nodes' tokens
+    main.nildb_api = ConcurrentNilDBAPI(
+        node_config,
+        max_workers=args.concurrency * len(node_config),
+        pool_maxsize=max(args.concurrency, 10)
+    ).with_auth(AuthContext.static({node_name: node["jwt"] for node_name, node in node_config.items()}))
+    # Importing main set these up from secrets.toml against the live nodes and the app's own
+    # files; measure the direct write and read paths against the simulator instead
+    if main.outbox is not None:
+        main.outbox.stop()
+    main.outbox = main.mirror = main.dedupe = None
+
+    try:
+        if args.load == "single":
+            print(json.dumps(run_upload(args.records, args.concurrency)))
+        else:
+            print(json.dumps(run_bulk_load(args.records, args.batch_size)))
+        print(json.dumps(run_fetch(args.fetch_runs)))
+        print(json.dumps({"transport": main.nildb_api.transport_stats()}))
+    finally:
+        for node in nodes.values():
+            node.stop()
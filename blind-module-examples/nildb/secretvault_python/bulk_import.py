@@ -0,0 +1,260 @@
+"""Bulk credential import from CSV/JSONL files."""
+import argparse
+import csv
+import itertools
+import json
+import time
+import uuid
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from config import (NODE_CONFIG, SCHEMA_ID, SHARE_ENCODING, COMPRESSION, ORG_SECRET_KEY,
+                    MATCH_FIELDS, MATCH_SEED)
+import generate_tokens
+from nildb_api import ConcurrentNilDBAPI
+from encryption import DataEncryption
+from dedupe import DigestIndex, DEFAULT_DEDUPE_PATH
+from share_join import batched
+from validation import SchemaValidator, DEFAULT_SCHEMA_PATH
+
+# Records secret-shared per batch
+DEFAULT_BATCH_SIZE = 1000
+# Upper bound for a single data/create body, kept well below the node payload limit
+DEFAULT_MAX_CHUNK_BYTES = 512 * 1024
+# Upper bound for records in a single data/create body
+DEFAULT_MAX_CHUNK_RECORDS = 500
+
+# Plaintext fields of a record as share_batch stores them
+STORED_FIELDS = ("_id", "username", "password", "service")
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """Stream credential records from a CSV (with header) or JSONL file."""
+    with open(path, "r", newline="") as file:
+        if path.endswith(".jsonl") or path.endswith(".ndjson"):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(file):
+                yield row
+
+
+def with_ids(records: Iterable[Dict]) -> Iterator[Dict]:
+    """Assign a fresh _id to records that do not carry one."""
+    for record in records:
+        if not record.get("_id"):
+            record["_id"] = str(uuid.uuid4())
+        yield record
+
+
+def validated(records: Iterable[Dict], validator: SchemaValidator, batch_size: int,
+              on_invalid: Callable[[Dict, List[str]], None]) -> Iterator[Dict]:
+    """Check records against the collection schema a batch at a time and pass on only valid ones.
+
+    Records are reduced to the fields that will be stored, so extra input columns are ignored.
+    """
+    for batch in batched(records, batch_size):
+        valid, invalid = validator.validate([{field: record.get(field) for field in STORED_FIELDS} for record in batch])
+        for record, errors in invalid:
+            on_invalid(record, errors)
+        yield from valid
+
+
+def share_batch(node_names: List[str], records: List[Dict], share_columns: List[List[str]],
+                match_tokens: Optional[List[Dict]] = None) -> Dict[str, List[Dict]]:
+    """Combine a batch of records with their per-node password share columns.
+
+    match_tokens, if given, holds one dict of match token fields per record; they are the
+    same on every node.
+    """
+    match_tokens = match_tokens or [{}] * len(records)
+    node_payloads = {}
+    for node_name, shares in zip(node_names, share_columns):
+        node_payloads[node_name] = [
+            {
+                "_id": record["_id"],
+                "username": record["username"],
+                "password": share,
+                "service": record["service"],
+                **tokens
+            }
+            for record, share, tokens in zip(records, shares, match_tokens)
+        ]
+    return node_payloads
+
+
+def chunk_bounds(node_payloads: Dict[str, List[Dict]],
+                 max_chunk_bytes: int = DEFAULT_MAX_CHUNK_BYTES,
+                 max_chunk_records: int = DEFAULT_MAX_CHUNK_RECORDS) -> Iterator[tuple]:
+    """Yield (start, end) slices so every node's chunk stays under the size and count limits.
+
+    Chunks are aligned across nodes so that a record's shares always travel together.
+    """
+    columns = list(node_payloads.values())
+    count = len(columns[0]) if columns else 0
+    start, size = 0, 0
+    for i in range(count):
+        record_size = max(len(json.dumps(column[i])) + 1 for column in columns)
+        if i > start and (size + record_size > max_chunk_bytes or i - start >= max_chunk_records):
+            yield start, i
+            start, size = i, 0
+        size += record_size
+    if start < count:
+        yield start, count
+
+
+class ImportReport:
+    """Running totals and throughput for an import."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.uploaded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.invalid = 0
+        self.chunks = 0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def throughput(self) -> float:
+        return self.uploaded / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            "uploaded": self.uploaded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "invalid": self.invalid,
+            "chunks": self.chunks,
+            "elapsed_s": round(self.elapsed, 3),
+            "records_per_s": round(self.throughput, 1)
+        }
+
+    def __str__(self) -> str:
+        return (f"{self.uploaded} uploaded, {self.failed} failed, {self.invalid} invalid, {self.skipped} unchanged in {self.chunks} chunks, "
+                f"{self.elapsed:.1f}s ({self.throughput:.0f} records/s)")
+
+
+def upload_node_payloads(nildb_api: ConcurrentNilDBAPI,
+                         schema_id: str,
+                         node_payloads: Dict[str, List[Dict]],
+                         report: ImportReport,
+                         max_chunk_bytes: int = DEFAULT_MAX_CHUNK_BYTES,
+                         max_chunk_records: int = DEFAULT_MAX_CHUNK_RECORDS,
+                         on_stored: Optional[Callable[[str, List[str]], None]] = None) -> None:
+    """Upload already-shared per-node records in aligned, size-bounded chunks.
+
+    on_stored is called with (node_name, record ids) for every chunk a node accepted.
+    """
+    for start, end in chunk_bounds(node_payloads, max_chunk_bytes, max_chunk_records):
+        results = nildb_api.data_upload_all(schema_id, {
+            node_name: records[start:end] for node_name, records in node_payloads.items()
+        })
+        report.chunks += 1
+        if on_stored is not None:
+            for node_name, ok in results.items():
+                if ok:
+                    on_stored(node_name, [record["_id"] for record in node_payloads[node_name][start:end]])
+        if all(results.values()):
+            report.uploaded += end - start
+        else:
+            failed_nodes = [node_name for node_name, ok in results.items() if not ok]
+            print(f"Chunk {start}-{end} failed on {', '.join(failed_nodes)}")
+            report.failed += end - start
+
+
+def bulk_import(path: str,
+                nildb_api: Optional[ConcurrentNilDBAPI] = None,
+                encryption: Optional[DataEncryption] = None,
+                schema_id: str = SCHEMA_ID,
+                batch_size: int = DEFAULT_BATCH_SIZE,
+                max_chunk_bytes: int = DEFAULT_MAX_CHUNK_BYTES,
+                max_chunk_records: int = DEFAULT_MAX_CHUNK_RECORDS,
+                progress: bool = True,
+                dedupe: Optional[DigestIndex] = None,
+                validator: Optional[SchemaValidator] = None,
+                rejects_path: Optional[str] = None) -> ImportReport:
+    """Stream records from a file, secret-share them in batches and upload them in chunks.
+
+    With a dedupe index, records get content-derived ids and those every node already
+    holds are skipped, so re-running an import only uploads what changed.
+
+    With a validator, records that would fail the collection schema are dropped before
+    they are encrypted or sent; rejects_path collects them with their errors as JSONL.
+    """
+    nildb_api = nildb_api or ConcurrentNilDBAPI(NODE_CONFIG, compression=COMPRESSION).with_auth(
+        generate_tokens.auth_context())
+    encryption = encryption or DataEncryption(len(nildb_api.nodes), share_encoding=SHARE_ENCODING,
+                                              match_fields=MATCH_FIELDS, match_seed=MATCH_SEED)
+    node_names = list(nildb_api.nodes.keys())
+    report = ImportReport()
+
+    if dedupe is not None:
+        def on_skip(count: int) -> None:
+            report.skipped += count
+
+        def on_stored(node_name: str, record_ids: List[str]) -> None:
+            dedupe.mark(schema_id, node_name, record_ids)
+
+        source = dedupe.skip_present(schema_id, node_names, read_records(path), batch_size, on_skip)
+    else:
+        source, on_stored = with_ids(read_records(path)), None
+
+    rejects = open(rejects_path, "w") if rejects_path else None
+    if validator is not None:
+        def on_invalid(record: Dict, errors: List[str]) -> None:
+            report.invalid += 1
+            if rejects is not None:
+                rejects.write(json.dumps({"record": record, "errors": errors}) + "\n")
+            elif report.invalid <= 10:
+                print(f"Invalid record {record.get('_id')}: {'; '.join(errors)}")
+
+        source = validated(source, validator, batch_size, on_invalid)
+
+    # Secret-share upcoming batches in worker processes while the current one uploads
+    records, password_records = itertools.tee(source)
+    share_columns = encryption.encrypt_many(
+        (record["password"] for record in password_records),
+        chunk_size=batch_size
+    )
+
+    try:
+        for batch, columns in zip(batched(records, batch_size), share_columns):
+            node_payloads = share_batch(node_names, batch, columns,
+                                        [encryption.match_tokens(record) for record in batch])
+            upload_node_payloads(nildb_api, schema_id, node_payloads, report,
+                                 max_chunk_bytes, max_chunk_records, on_stored)
+            if progress:
+                print(report)
+    finally:
+        if rejects is not None:
+            rejects.close()
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import credentials into SecretVault")
+    parser.add_argument("path", help="CSV (username,password,service header) or JSONL file")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--max-chunk-bytes", type=int, default=DEFAULT_MAX_CHUNK_BYTES)
+    parser.add_argument("--max-chunk-records", type=int, default=DEFAULT_MAX_CHUNK_RECORDS)
+    parser.add_argument("--dedupe", nargs="?", const=DEFAULT_DEDUPE_PATH, metavar="INDEX_PATH",
+                        help="use content-derived ids and skip records every node already holds")
+    parser.add_argument("--schema", default=DEFAULT_SCHEMA_PATH,
+                        help="collection schema used to reject invalid records before upload")
+    parser.add_argument("--no-validate", action="store_true")
+    parser.add_argument("--rejects", metavar="PATH", help="write invalid records and their errors as JSONL")
+    args = parser.parse_args()
+
+    report = bulk_import(args.path,
+                         batch_size=args.batch_size,
+                         max_chunk_bytes=args.max_chunk_bytes,
+                         max_chunk_records=args.max_chunk_records,
+                         dedupe=DigestIndex(ORG_SECRET_KEY, args.dedupe) if args.dedupe else None,
+                         validator=None if args.no_validate else SchemaValidator.from_file(args.schema),
+                         rejects_path=args.rejects)
+    print(json.dumps(report.as_dict()))
@@ -0,0 +1,68 @@
+"""Wire encodings for secret shares and HTTP bodies."""
+import base64
+import gzip
+from typing import List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Share encodings: nilql's native base64 text, or base85 (~6% smaller, still JSON-safe)
+SHARE_ENCODINGS = ("base64", "base85")
+
+# Marks a base85-encoded share so records written with either encoding can be decoded
+BASE85_PREFIX = "85:"
+
+
+def encode_share(share, encoding: str = "base64"):
+    """Re-encode a nilql share for storage; non-string shares (e.g. sum shares) pass through."""
+    if encoding == "base64" or not isinstance(share, str):
+        return share
+    if encoding == "base85":
+        return BASE85_PREFIX + base64.b85encode(base64.b64decode(share)).decode("ascii")
+    raise ValueError(f"Unknown share encoding {encoding}")
+
+
+def decode_share(share):
+    """Return the share in nilql's native encoding, whichever encoding it was stored with."""
+    if isinstance(share, str) and share.startswith(BASE85_PREFIX):
+        return base64.b64encode(base64.b85decode(share[len(BASE85_PREFIX):])).decode("ascii")
+    return share
+
+
+def encode_shares(shares: List, encoding: str = "base64") -> List:
+    return [encode_share(share, encoding) for share in shares]
+
+
+def decode_shares(shares: List) -> List:
+    return [decode_share(share) for share in shares]
+
+
+def supported_compressions() -> List[str]:
+    """Content codings this client can produce and accept."""
+    return ["gzip", "zstd"] if zstandard is not None else ["gzip"]
+
+
+def compress(body: bytes, compression: Optional[str]) -> bytes:
+    if compression is None:
+        return body
+    if compression == "gzip":
+        return gzip.compress(body, compresslevel=5)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstd compression requires zstandard (pip install zstandard)")
+        return zstandard.ZstdCompressor().compress(body)
+    raise ValueError(f"Unknown compression {compression}")
+
+
+def decompress(body: bytes, compression: Optional[str]) -> bytes:
+    if not compression or compression == "identity":
+        return body
+    if compression == "gzip":
+        return gzip.decompress(body)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstd decompression requires zstandard (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    raise ValueError(f"Unknown compression {compression}")
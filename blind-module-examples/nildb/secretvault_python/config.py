@@ -1,21 +1,33 @@
 """Configuration settings for the credential manager."""
 import streamlit as st
 
-# Node configurations
-NODE_CONFIG = {
-    'node_a': {
-        'url': st.secrets["node_a"]["url"],
-        'did': st.secrets["node_a"]["did"]
-    },
-    'node_b': {
-        'url': st.secrets["node_b"]["url"],
-        'did': st.secrets["node_b"]["did"]
-    },
-    'node_c': {
-        'url': st.secrets["node_c"]["url"],
-        'did': st.secrets["node_c"]["did"]
-    },
-}
+# Node names of the original fixed three-node layout ([node_a], [node_b], [node_c] tables)
+LEGACY_NODE_NAMES = ["node_a", "node_b", "node_c"]
+
+
+def _node_config(nodes) -> dict:
+    """Node name -> connection settings for one cluster's list of [[nodes]] entries."""
+    return {
+        node.get("name", f"node_{i}"): {
+            'url': node["url"],
+            'did': node["did"],
+            'timeout': node.get("timeout")
+        }
+        for i, node in enumerate(nodes)
+    }
+
+
+# Cluster name -> node configurations; [[clusters]] with nested nodes, a single [[nodes]] list,
+# or the legacy node_a/node_b/node_c tables
+if "clusters" in st.secrets:
+    CLUSTERS = {cluster["name"]: _node_config(cluster["nodes"]) for cluster in st.secrets["clusters"]}
+elif "nodes" in st.secrets:
+    CLUSTERS = {"default": _node_config(st.secrets["nodes"])}
+else:
+    CLUSTERS = {"default": _node_config([{"name": name, **st.secrets[name]} for name in LEGACY_NODE_NAMES])}
+
+# Node configurations of the cluster the app reads and writes
+NODE_CONFIG = next(iter(CLUSTERS.values()))
 
 # Schema ID for credential storage
 SCHEMA_ID = st.secrets["schema_id"]
@@ -27,4 +39,28 @@ ORG_DID = st.secrets["org_did"]
 ORG_SECRET_KEY = st.secrets["org_secret_key"]
 
 # Number of nodes for secret sharing
-NUM_NODES = len(NODE_CONFIG)
\ No newline at end of file
+NUM_NODES = len(NODE_CONFIG)
+
+# Wire encoding for password shares ("base64" or the more compact "base85")
+SHARE_ENCODING = st.secrets.get("share_encoding", "base64")
+
+# Request body compression ("gzip", "zstd" or unset for none)
+COMPRESSION = st.secrets.get("compression")
+
+# Local share mirror (e.g. ".streamlit/mirror.db"); unset to always read from the nodes
+MIRROR_PATH = st.secrets.get("mirror_path")
+
+# Durable outbox for background writes (e.g. ".streamlit/outbox.db"); unset to write synchronously
+OUTBOX_PATH = st.secrets.get("outbox_path")
+
+# Content-hash dedupe index (e.g. ".streamlit/dedupe.db"); unset to give every new record a random id
+DEDUPE_PATH = st.secrets.get("dedupe_path")
+
+# Fields stored with a deterministic match token so they can be looked up by encrypted value
+MATCH_FIELDS = list(st.secrets.get("match_fields", []))
+
+# Seed for the match keys; tokens only stay comparable while it is unchanged
+MATCH_SEED = st.secrets.get("match_seed", ORG_SECRET_KEY)
+
+# Port for the Prometheus /metrics endpoint; unset to disable
+METRICS_PORT = st.secrets.get("metrics_port")
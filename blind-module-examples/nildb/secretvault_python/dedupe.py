@@ -0,0 +1,118 @@
+"""Content-hash dedupe: deterministic record ids and a local index of records every node holds."""
+import hashlib
+import hmac
+import json
+import sqlite3
+import threading
+import uuid
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+DEFAULT_DEDUPE_PATH = ".streamlit/dedupe.db"
+
+# Fields that make up a record's content digest
+CONTENT_FIELDS = ("username", "service", "password")
+
+# Record ids looked up per index query
+LOOKUP_BATCH_SIZE = 500
+
+
+def content_id(secret: str, record: Dict) -> str:
+    """Deterministic _id for a plaintext record: a keyed HMAC of its content, shaped as a UUID.
+
+    Keying with the org secret keeps the id from revealing the plaintext to the nodes.
+    """
+    content = json.dumps([record.get(field) for field in CONTENT_FIELDS], separators=(",", ":"))
+    digest = hmac.new(secret.encode(), content.encode(), hashlib.sha256).digest()
+    return str(uuid.UUID(bytes=digest[:16], version=5))
+
+
+class DigestIndex:
+    """SQLite record of which content-addressed records each node has acknowledged.
+
+    Records whose id is present for every node are skipped on upload, so a re-run only
+    transfers what changed.
+    """
+
+    def __init__(self, secret: str, path: str = DEFAULT_DEDUPE_PATH):
+        self.secret = secret
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS stored (
+                    schema_id TEXT NOT NULL,
+                    record_id TEXT NOT NULL,
+                    node TEXT NOT NULL,
+                    PRIMARY KEY (schema_id, record_id, node)
+                )
+            """)
+
+    def assign_ids(self, records: Iterable[Dict]) -> Iterator[Dict]:
+        """Give each record its content id, replacing any random one."""
+        for record in records:
+            record["_id"] = content_id(self.secret, record)
+            yield record
+
+    def present(self, schema_id: str, record_ids: List[str], node_names: List[str]) -> Set[str]:
+        """Ids out of record_ids that every listed node already holds."""
+        present = set()
+        for start in range(0, len(record_ids), LOOKUP_BATCH_SIZE):
+            chunk = record_ids[start:start + LOOKUP_BATCH_SIZE]
+            id_marks = ",".join("?" * len(chunk))
+            node_marks = ",".join("?" * len(node_names))
+            with self._lock:
+                rows = self.conn.execute(
+                    f"SELECT record_id FROM stored WHERE schema_id = ? AND record_id IN ({id_marks}) "
+                    f"AND node IN ({node_marks}) GROUP BY record_id HAVING COUNT(*) = ?",
+                    [schema_id, *chunk, *node_names, len(node_names)]
+                ).fetchall()
+            present.update(record_id for record_id, in rows)
+        return present
+
+    def skip_present(self, schema_id: str, node_names: List[str], records: Iterable[Dict],
+                     batch_size: int = LOOKUP_BATCH_SIZE,
+                     on_skip: Optional[Callable[[int], None]] = None) -> Iterator[Dict]:
+        """Assign content ids and drop records every node already holds, or repeated within a batch.
+
+        on_skip is called with the number of records dropped from each batch.
+        """
+        batch = []
+        for record in self.assign_ids(records):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield from self._new(schema_id, node_names, batch, on_skip)
+                batch = []
+        yield from self._new(schema_id, node_names, batch, on_skip)
+
+    def _new(self, schema_id: str, node_names: List[str], batch: List[Dict],
+             on_skip: Optional[Callable[[int], None]]) -> List[Dict]:
+        seen = self.present(schema_id, [record["_id"] for record in batch], node_names)
+        new = []
+        for record in batch:
+            if record["_id"] not in seen:
+                seen.add(record["_id"])
+                new.append(record)
+        if on_skip is not None and len(new) < len(batch):
+            on_skip(len(batch) - len(new))
+        return new
+
+    def mark(self, schema_id: str, node_name: str, record_ids: Iterable[str]) -> None:
+        """Remember that a node acknowledged these records."""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO stored (schema_id, record_id, node) VALUES (?, ?, ?)",
+                [(schema_id, record_id, node_name) for record_id in record_ids]
+            )
+
+    def forget(self, schema_id: str, record_ids: Iterable[str]) -> None:
+        """Drop records that were deleted on the nodes."""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM stored WHERE schema_id = ? AND record_id = ?",
+                [(schema_id, record_id) for record_id in record_ids]
+            )
+
+    def close(self) -> None:
+        self.conn.close()
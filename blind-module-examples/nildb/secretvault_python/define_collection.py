@@ -59,7 +59,7 @@ def update_schema_id(schema_id: str) -> None:
 
 
 if __name__ == "__main__":
-    # generate short-lived JTWs
-    generate_tokens.update_config()
+    # authorize with short-lived JWTs
+    nildb_api = nildb_api.with_auth(generate_tokens.auth_context())
     # register on nodes
     define_collection(json.load(open('schema.json', 'r')))
\ No newline at end of file
@@ -1,28 +1,190 @@
 """Encryption utilities using nilql for secret sharing."""
+import hashlib
+import hmac
+import multiprocessing
 import nilql
-from typing import List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from codec import decode_shares, encode_shares
+
+# Share-lists handed to a worker process at a time
+DEFAULT_CHUNK_SIZE = 256
+
+# Below this many records the pool overhead outweighs the parallelism
+MIN_PARALLEL_BATCH = 512
+
+# Chunks submitted to the pool ahead of the consumer when encrypting a stream
+DEFAULT_MAX_PENDING = 8
+
+# Worker start method: never plain fork, which can copy a lock held by another thread (JWT
+# refresh, outbox, hedged and prefetch reads) into a worker that then deadlocks on it
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# Suffix of the stored field holding a field's match token
+MATCH_SUFFIX = "_match"
+
+
+def _match_key(num_nodes: int, match_seed: str, field: str):
+    """Seeded nilql match key for one field; the same seed always gives the same key."""
+    return nilql.SecretKey.generate(
+        {'nodes': [{}] * num_nodes},
+        {'match': True},
+        seed=hmac.new(match_seed.encode(), field.encode(), hashlib.sha256).digest()
+    )
+
+
+def _match_ciphertext(key, value: str) -> str:
+    # nilql returns a base64 str, replicated into a list for multi-node clusters
+    ciphertext = nilql.encrypt(key, value)
+    return ciphertext[0] if isinstance(ciphertext, list) else ciphertext
+
+
+def match_field(field: str) -> str:
+    """Name of the stored field that holds the match token for field."""
+    return field + MATCH_SUFFIX
+
+
+def _encrypt_chunk(secret_key, chunk: Sequence[str], share_encoding: str = "base64") -> List[List[str]]:
+    """Secret-share a chunk of plaintexts in a worker and return one share column per node."""
+    columns = None
+    for plaintext in chunk:
+        shares = encode_shares(list(nilql.encrypt(secret_key, plaintext)), share_encoding)
+        if columns is None:
+            columns = [[] for _ in shares]
+        for column, share in zip(columns, shares):
+            column.append(share)
+    return columns or []
+
+
+def _decrypt_chunk(secret_key, chunk: Sequence[List[str]]) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Decrypt a chunk of share-lists in a worker, capturing errors per record."""
+    results = []
+    for shares in chunk:
+        try:
+            results.append((str(nilql.decrypt(secret_key, decode_shares(shares))), None))
+        except Exception as e:
+            results.append((None, f"Decryption failed: {str(e)}"))
+    return results
+
 
 class DataEncryption:
-    def __init__(self, num_nodes: int):
+    def __init__(self, num_nodes: int,
+                 max_workers: Optional[int] = None,
+                 operations: Optional[dict] = None,
+                 share_encoding: str = "base64",
+                 match_fields: Sequence[str] = (),
+                 match_seed: Optional[str] = None):
         self.num_nodes = num_nodes
-        self.secret_key = nilql.ClusterKey.generate({'nodes': [{}] * num_nodes},{'store': True})
+        self.share_encoding = share_encoding
+        self.operations = operations if operations is not None else {'store': True}
+        self.secret_key = nilql.ClusterKey.generate({'nodes': [{}] * num_nodes}, self.operations)
+        # Match keys must be identical across processes and restarts, so they come from a fixed seed
+        if match_fields and not match_seed:
+            raise ValueError("match_fields require a match_seed")
+        self.match_keys = {field: _match_key(num_nodes, match_seed, field) for field in match_fields}
+        for field, key in self.match_keys.items():
+            # Tokens written by one process are only searchable from another if keys are reproducible
+            if _match_ciphertext(key, field) != _match_ciphertext(_match_key(num_nodes, match_seed, field), field):
+                raise ValueError(f"nilql did not derive a reproducible match key for {field}; check the nilql version")
+        self.max_workers = max_workers
+        self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context(START_METHOD))
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
 
     def encrypt_password(self, password: str) -> List[str]:
         """Encrypt password using secret sharing."""
         try:
             encrypted_shares = nilql.encrypt(self.secret_key, password)
 
-            return list(encrypted_shares)
+            return encode_shares(list(encrypted_shares), self.share_encoding)
         except Exception as e:
             raise Exception(f"Encryption failed: {str(e)}")
 
     def decrypt_password(self, encoded_shares: List[str]) -> str:
         """Decrypt password from shares."""
         try:
-            decoded_shares = []
-            for share in encoded_shares:
-                decoded_shares.append(share)
-                
+            decoded_shares = decode_shares(encoded_shares)
+
             return str(nilql.decrypt(self.secret_key, decoded_shares))
         except Exception as e:
             raise Exception(f"Decryption failed: {str(e)}")
+
+    def match_token(self, field: str, value: str) -> str:
+        """Deterministic token for value under field's match key; equal values give equal tokens."""
+        return _match_ciphertext(self.match_keys[field], value)
+
+    def match_tokens(self, record: Dict) -> Dict[str, str]:
+        """Match token fields to store alongside a plaintext record."""
+        return {
+            match_field(field): self.match_token(field, record[field])
+            for field in self.match_keys
+            if record.get(field) is not None
+        }
+
+    def decrypt_total(self, node_totals: List[int]) -> int:
+        """Combine per-node sums of sum-shared values (needs a key with the 'sum' operation)."""
+        try:
+            return nilql.decrypt(self.secret_key, list(node_totals))
+        except Exception as e:
+            raise Exception(f"Decryption failed: {str(e)}")
+
+    def encrypt_many(self, plaintexts: Iterable[str],
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     max_pending: int = DEFAULT_MAX_PENDING) -> Iterator[List[List[str]]]:
+        """Secret-share a stream of plaintexts across worker processes.
+
+        Yields, per chunk of up to chunk_size inputs and in input order, one column of
+        shares per node (column i is the data_upload payload field for node i). At most
+        max_pending chunks are read ahead of the consumer.
+        """
+        pending = deque()
+        chunk = []
+        try:
+            for plaintext in plaintexts:
+                chunk.append(plaintext)
+                if len(chunk) < chunk_size:
+                    continue
+                pending.append(self._get_pool().submit(_encrypt_chunk, self.secret_key, chunk, self.share_encoding))
+                chunk = []
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            if chunk:
+                pending.append(self._get_pool().submit(_encrypt_chunk, self.secret_key, chunk, self.share_encoding))
+            while pending:
+                yield pending.popleft().result()
+        except Exception as e:
+            raise Exception(f"Encryption failed: {str(e)}")
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def decrypt_many(self, share_lists: Sequence[List[str]],
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Decrypt a batch of share-lists across worker processes.
+
+        Returns one (password, error) pair per input, in input order; exactly one of
+        the two is None.
+        """
+        if len(share_lists) < MIN_PARALLEL_BATCH:
+            return _decrypt_chunk(self.secret_key, share_lists)
+
+        chunks = [share_lists[i:i + chunk_size] for i in range(0, len(share_lists), chunk_size)]
+        futures = [self._get_pool().submit(_decrypt_chunk, self.secret_key, chunk) for chunk in chunks]
+        results = []
+        for chunk, future in zip(chunks, futures):
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                results.extend([(None, f"Decryption failed: {str(e)}")] * len(chunk))
+        return results
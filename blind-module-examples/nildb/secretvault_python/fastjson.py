@@ -0,0 +1,46 @@
+"""Fast JSON encoding/decoding and incremental parsing of node responses.
+
+orjson and ijson are optional; without them the standard library is used.
+"""
+import json
+from typing import IO, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def dumps(obj) -> bytes:
+    """Serialize a request body to UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def loads(data: bytes):
+    """Parse a complete JSON document."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def iter_items(stream: IO[bytes], prefix: str = "data.item") -> Iterator:
+    """Yield the elements of a JSON array inside a response as they are parsed off the stream.
+
+    prefix is an ijson path; the default walks the records of a {"data": [...]} body.
+    Without ijson the whole body is parsed first and the array is then yielded.
+    """
+    if ijson is not None:
+        yield from ijson.items(stream, prefix, use_float=True)
+        return
+
+    document = loads(stream.read())
+    for key in prefix.split(".")[:-1]:
+        document = document.get(key, []) if isinstance(document, dict) else []
+    yield from document
@@ -1,7 +1,15 @@
 import jwt
+import threading
 import time
+from cryptography.hazmat.primitives import serialization
 from ecdsa import SigningKey, SECP256k1
-from config import NODE_CONFIG, ORG_DID, ORG_SECRET_KEY
+from config import CLUSTERS, NODE_CONFIG, ORG_DID, ORG_SECRET_KEY
+
+# Lifetime of the JWTs handed to the app
+DEFAULT_TTL = 60
+
+# Seconds before expiry at which the background thread re-mints tokens
+DEFAULT_REFRESH_AHEAD = 15
 
 def create_jwt(secret_key: str = None,
                org_did: str = None,
@@ -34,14 +42,130 @@ def create_jwt(secret_key: str = None,
     
     return tokens
 
+class AuthContext:
+    """
+    Read-only mapping from node name to a current JWT, bound to one session or worker
+    """
+
+    def __init__(self, token_source, audiences: dict, session_id: str = None):
+        # token_source(audience) returns a valid JWT for that audience
+        self._token_source = token_source
+        self._audiences = dict(audiences)
+        self.session_id = session_id
+
+    @classmethod
+    def static(cls, tokens: dict, session_id: str = None) -> "AuthContext":
+        """Context over fixed per-node tokens (e.g. for simulated nodes)"""
+        return cls(dict(tokens).__getitem__, {node_name: node_name for node_name in tokens}, session_id)
+
+    def token(self, node_name: str) -> str:
+        return self._token_source(self._audiences[node_name])
+
+
+class TokenManager:
+    """
+    Cache one short-lived JWT per node audience and refresh it in the background before it expires
+    """
+
+    def __init__(self,
+                 secret_key: str,
+                 org_did: str,
+                 node_ids: list,
+                 ttl: int = DEFAULT_TTL,
+                 refresh_ahead: int = DEFAULT_REFRESH_AHEAD):
+        # Parse the org key once and keep it as a ready-to-sign key object
+        signer = SigningKey.from_string(bytes.fromhex(secret_key), curve=SECP256k1)
+        self._key = serialization.load_pem_private_key(signer.to_pem(), password=None)
+        self.org_did = org_did
+        self.node_ids = list(node_ids)
+        self.ttl = ttl
+        self.refresh_ahead = min(refresh_ahead, ttl // 2)
+
+        # audience -> (token, exp); replaced wholesale so readers never need a lock
+        self._tokens = {}
+        self._refresh()
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="jwt-refresh", daemon=True)
+        self._thread.start()
+
+    def _mint(self, node_id: str) -> tuple:
+        exp = int(time.time()) + self.ttl
+        payload = {
+            "iss": self.org_did,
+            "aud": node_id,
+            "exp": exp
+        }
+        return jwt.encode(payload, self._key, algorithm="ES256K"), exp
+
+    def _refresh(self) -> None:
+        self._tokens = {node_id: self._mint(node_id) for node_id in self.node_ids}
+
+    def _run(self) -> None:
+        while True:
+            next_exp = min(exp for _, exp in self._tokens.values())
+            if self._stop.wait(max(next_exp - self.refresh_ahead - time.time(), 0)):
+                return
+            try:
+                self._refresh()
+            except Exception as e:
+                print(f"Error refreshing JWTs: {str(e)}")
+                if self._stop.wait(1):
+                    return
+
+    def token(self, node_id: str) -> str:
+        """Return the cached token for a node audience, minting inline only if it has expired."""
+        token, exp = self._tokens[node_id]
+        if exp <= time.time():
+            token, exp = self._mint(node_id)
+            self._tokens = {**self._tokens, node_id: (token, exp)}
+        return token
+
+    def context(self, node_config: dict, session_id: str = None) -> AuthContext:
+        """Auth context for the nodes in node_config, served from this manager's token cache"""
+        return AuthContext(self.token, {node_name: node["did"] for node_name, node in node_config.items()}, session_id)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_token_manager = None
+_token_manager_lock = threading.Lock()
+
+
+def get_token_manager() -> TokenManager:
+    """
+    Return the process-wide token manager for the nodes of every configured cluster
+    """
+    global _token_manager
+    if _token_manager is None:
+        with _token_manager_lock:
+            if _token_manager is None:
+                node_ids = list(dict.fromkeys(
+                    node["did"] for node_config in CLUSTERS.values() for node in node_config.values()
+                ))
+                _token_manager = TokenManager(ORG_SECRET_KEY, ORG_DID, node_ids)
+    return _token_manager
+
+
+def auth_context(node_config: dict = None, session_id: str = None) -> AuthContext:
+    """
+    Auth context for the configured nodes, backed by the process-wide token manager
+    """
+    return get_token_manager().context(node_config if node_config is not None else NODE_CONFIG, session_id)
+
+
 def update_config() -> None:
     """
     Update the cluster config with short-lived JWTs
+
+    Legacy: this mutates the shared NODE_CONFIG; concurrent callers should bind an
+    AuthContext with NilDBAPI.with_auth instead
     """
-    # Create tokens for the nodes with 60s TTL
-    tokens = create_jwt(ORG_SECRET_KEY, ORG_DID, [node["did"] for node in NODE_CONFIG.values()], 60)
-    for node, token in zip(NODE_CONFIG.values(), tokens):
-        node["jwt"] = token
+    # Tokens are minted and refreshed ahead of expiry by the token manager
+    manager = get_token_manager()
+    for node in NODE_CONFIG.values():
+        node["jwt"] = manager.token(node["did"])
 
 
 if __name__ == "__main__":
@@ -1,81 +1,238 @@
 """Main Streamlit application for credential management."""
 import streamlit as st
 import uuid
+from datetime import date, datetime, timedelta, timezone
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-from config import NODE_CONFIG, SCHEMA_ID, NUM_NODES
+from config import (NODE_CONFIG, SCHEMA_ID, NUM_NODES, SHARE_ENCODING, COMPRESSION, MIRROR_PATH, OUTBOX_PATH,
+                    METRICS_PORT, DEDUPE_PATH, ORG_SECRET_KEY, MATCH_FIELDS, MATCH_SEED)
 import generate_tokens
-from nildb_api import NilDBAPI
-from encryption import DataEncryption
+from nildb_api import ConcurrentNilDBAPI, ids_filter
+from encryption import DataEncryption, match_field
+from share_join import ShareJoin, batched
+from query_builder import CredentialQuery, LISTING_FIELDS
+from mirror import ShareMirror
+from outbox import Outbox
+from dedupe import DigestIndex, content_id
+from metrics import METRICS
+from aggregates import default_registry
+
+# Sessions whose node requests can be in flight at once; each needs one worker and connection per node
+CONCURRENT_SESSIONS = 16
 
 # Initialize services
-nildb_api = NilDBAPI(NODE_CONFIG)
-encryption = DataEncryption(NUM_NODES)
+@st.cache_resource
+def get_nildb_api() -> ConcurrentNilDBAPI:
+    """One pooled client per server process; sessions bind their own credentials with with_auth()."""
+    return ConcurrentNilDBAPI(NODE_CONFIG, max_workers=CONCURRENT_SESSIONS * NUM_NODES,
+                              pool_maxsize=CONCURRENT_SESSIONS, hedge_after=1.0, compression=COMPRESSION)
+
+
+nildb_api = get_nildb_api()
+
+
+@st.cache_resource
+def get_encryption() -> DataEncryption:
+    """One DataEncryption (and its worker process pool) per server process."""
+    return DataEncryption(NUM_NODES, share_encoding=SHARE_ENCODING, match_fields=MATCH_FIELDS, match_seed=MATCH_SEED)
+
+
+encryption = get_encryption()
+
+
+@st.cache_resource
+def get_mirror() -> ShareMirror:
+    """One mirror connection per server process."""
+    return ShareMirror(MIRROR_PATH)
+
+
+@st.cache_resource
+def get_dedupe() -> DigestIndex:
+    """One dedupe index connection per server process."""
+    return DigestIndex(ORG_SECRET_KEY, DEDUPE_PATH)
+
+
+mirror = get_mirror() if MIRROR_PATH else None
+dedupe = get_dedupe() if DEDUPE_PATH else None
+
+
+@st.cache_resource
+def get_outbox() -> Outbox:
+    """One background outbox worker per server process (Streamlit re-runs this module on every interaction)."""
+    # The worker outlives any session, so it gets its own auth context, and its own threads so
+    # a flush waiting out a slow node never holds up session requests
+    worker_api = nildb_api.with_auth(generate_tokens.auth_context(session_id="outbox")).with_executor(
+        thread_name_prefix="outbox")
+    # Delivered records become skippable for later uploads of the same content
+    return Outbox(worker_api, OUTBOX_PATH, on_acked=dedupe.mark if dedupe is not None else None).start()
+
+
+outbox = get_outbox() if OUTBOX_PATH else None
+
+
+@st.cache_resource
+def start_metrics_server(port: int):
+    """Serve NilDBAPI metrics in Prometheus text format, once per server process."""
+    return METRICS.serve(port)
+
+
+if METRICS_PORT:
+    start_metrics_server(int(METRICS_PORT))
+
+# Joined records handed to decrypt_many at a time
+DECRYPT_BATCH_SIZE = 2048
 
 def init_session_state():
     """Initialize session state variables."""
     if 'credentials' not in st.session_state:
         st.session_state.credentials = []
+    if 'auth' not in st.session_state:
+        st.session_state.auth = generate_tokens.auth_context(session_id=str(uuid.uuid4()))
+
+def session_api() -> ConcurrentNilDBAPI:
+    """The shared client, authorized with the current session's credentials."""
+    return nildb_api.with_auth(st.session_state.auth)
 
-def upload_credentials(username: str, password: str, service: str) -> bool:
-    """Create and store encrypted credentials across nodes."""
+def upload_credentials(username: str, password: str, service: str,
+                       api: Optional[ConcurrentNilDBAPI] = None) -> bool:
+    """Create and store encrypted credentials across nodes (with api, or the session's client by default)."""
     try:
-        # Generate unique ID
-        cred_id = str(uuid.uuid4())        
+        api = api or session_api()
+        if dedupe is not None:
+            # Identical credentials map to the same id; skip them once every node has a copy
+            cred_id = content_id(ORG_SECRET_KEY, {"username": username, "password": password, "service": service})
+            if dedupe.present(SCHEMA_ID, [cred_id], list(api.nodes.keys())):
+                return True
+        else:
+            # Generate unique ID
+            cred_id = str(uuid.uuid4())
         # Encrypt password into shares
         encrypted_shares = encryption.encrypt_password(password)
         
-        # Store shares across nodes
-        success = True
-        for i, node_name in enumerate(['node_a', 'node_b', 'node_c']):
+        # Deterministic tokens for fields that support lookup by encrypted value
+        match_tokens = encryption.match_tokens({"username": username, "service": service})
+
+        # Store shares across nodes, one request per node in parallel
+        payloads = {}
+        for i, node_name in enumerate(api.nodes):
             credentials_data = {
                     "_id": cred_id,
                     "username": username,
                     "password": encrypted_shares[i],
-                    "service": service
+                    "service": service,
+                    **match_tokens
             }
-            if not nildb_api.data_upload(node_name, SCHEMA_ID, [credentials_data]):
-                success = False
-                break
-                
-        return success
+            payloads[node_name] = [credentials_data]
+
+        if outbox is not None:
+            # Durably queue the per-node writes; the outbox delivers and retries them in the background
+            outbox.enqueue(SCHEMA_ID, payloads)
+            return True
+
+        results = api.data_upload_all(SCHEMA_ID, payloads)
+        if dedupe is not None:
+            for node_name, ok in results.items():
+                if ok:
+                    dedupe.mark(SCHEMA_ID, node_name, [cred_id])
+        return all(results.values())
     except Exception as e:
         st.error(f"Error creating credentials: {str(e)}")
         return False
 
-def fetch_credentials() -> List[Dict]:
-    """Fetch and decrypt credentials from nodes."""
+def replace_password(cred_id: str, password: str, api: ConcurrentNilDBAPI) -> bool:
+    """Store a record with a new password under the content id of its new content and delete the old one.
+
+    A content id must keep describing its record: were the old id updated in place, adding the
+    original credentials again would hit the duplicate id and be taken as already stored.
+    """
+    current = api.data_read(next(iter(api.nodes)), SCHEMA_ID, ids_filter([cred_id]))
+    if not current:
+        st.error(f"Credentials {cred_id} not found")
+        return False
+    username, service = current[0]["username"], current[0]["service"]
+    if content_id(ORG_SECRET_KEY, {"username": username, "password": password, "service": service}) == cred_id:
+        return True
+    return upload_credentials(username, password, service, api) and delete_credentials([cred_id], api)
+
+def update_password(cred_id: str, password: str, api: Optional[ConcurrentNilDBAPI] = None) -> bool:
+    """Re-share a password and overwrite each node's share of an existing record.
+
+    With content ids (dedupe enabled) the record gets a new id instead; see replace_password.
+    """
     try:
-        # Fetch from all nodes
-        credentials = {}
-        for node_name in ['node_a', 'node_b', 'node_c']:
-            node_creds = nildb_api.data_read(node_name, SCHEMA_ID)
-            print('node_creds', node_creds)
-            for cred in node_creds:
-                cred_id = cred['_id']
-                if cred_id not in credentials:
-                    credentials[cred_id] = {
-                        'username': cred['username'],
-                        'service': cred['service'],
-                        'shares': []
-                    }
-                credentials[cred_id]['shares'].append(cred['password'])
-        
-        # Decrypt password
+        api = api or session_api()
+        if dedupe is not None:
+            return replace_password(cred_id, password, api)
+        encrypted_shares = encryption.encrypt_password(password)
+        updates = {
+            node_name: ({"_id": cred_id, "$coerce": {"_id": "uuid"}}, {"$set": {"password": encrypted_shares[i]}})
+            for i, node_name in enumerate(api.nodes)
+        }
+        results = api.data_update_all(SCHEMA_ID, updates)
+        return all(result is not None for result in results.values())
+    except Exception as e:
+        st.error(f"Error updating credentials: {str(e)}")
+        return False
+
+def delete_credentials(cred_ids: List[str], api: Optional[ConcurrentNilDBAPI] = None) -> bool:
+    """Delete records by id from every node."""
+    try:
+        api = api or session_api()
+        results = api.data_delete_ids_all(SCHEMA_ID, cred_ids)
+        if mirror is not None:
+            mirror.forget(SCHEMA_ID, cred_ids)
+        if dedupe is not None:
+            dedupe.forget(SCHEMA_ID, cred_ids)
+        return all(results.values())
+    except Exception as e:
+        st.error(f"Error deleting credentials: {str(e)}")
+        return False
+
+def fetch_credentials(service: Optional[str] = None, username: Optional[str] = None,
+                      api: Optional[ConcurrentNilDBAPI] = None) -> List[Dict]:
+    """Fetch and decrypt credentials from nodes, optionally for a single service and/or username."""
+    try:
+        api = api or session_api()
+        # Only the matching records and listing fields leave the nodes
+        query = CredentialQuery().fields(*LISTING_FIELDS)
+        for field, value in (("service", service), ("username", username)):
+            if not value:
+                continue
+            if field in encryption.match_keys:
+                # Look up by match token so the filter never carries the plaintext
+                query.where(match_field(field), encryption.match_token(field, value))
+            else:
+                query.where(field, value)
+
+        if mirror is not None:
+            # Transfer only what changed since the last sync, then list from the local mirror
+            mirror.sync(api, SCHEMA_ID)
+            join = mirror.iter_joined(SCHEMA_ID, list(api.nodes.keys()), query.filter())
+        else:
+            # Stream pages from all nodes in parallel and join shares by _id as they arrive
+            join = ShareJoin(api.data_read_streams(
+                SCHEMA_ID,
+                query.filter(),
+                projection=query.projection()
+            ))
+
+        # Decrypt complete records in batches spread across worker processes
         decrypted_creds = []
-        for cred_id, cred_data in credentials.items():
-            if len(cred_data['shares']) == NUM_NODES:
-                try:
-                    password = encryption.decrypt_password(cred_data['shares'])
-                    decrypted_creds.append({
-                        'Service': cred_data['service'],
-                        'Username': cred_data['username'],
-                        'Password': password
-                    })
-                except Exception as e:
-                    st.warning(f"Could not decrypt credentials {cred_id}: {str(e)}")
-                    
+        for batch in batched(join, DECRYPT_BATCH_SIZE):
+            share_lists = [[record['password'] for record in records] for _, records in batch]
+            results = encryption.decrypt_many(share_lists)
+            for (cred_id, records), (password, error) in zip(batch, results):
+                if error is not None:
+                    st.warning(f"Could not decrypt credentials {cred_id}: {error}")
+                    continue
+                decrypted_creds.append({
+                    'ID': cred_id,
+                    'Service': records[0]['service'],
+                    'Username': records[0]['username'],
+                    'Password': password
+                })
+
         return decrypted_creds
     except Exception as e:
         st.error(f"Error fetching credentials: {str(e)}")
@@ -99,20 +256,25 @@ def main():
                 st.error("Please fill in all fields")
             else:
                 with st.spinner("Encrypting and storing credentials..."):
-                    # generate short-lived JTWs
-                    generate_tokens.update_config()
                     if upload_credentials(username, password, service):
-                        st.success("Credentials saved successfully!")
+                        if outbox is not None:
+                            st.success("Credentials queued; they will be stored on every node in the background.")
+                        else:
+                            st.success("Credentials saved successfully!")
                     else:
                         st.error("Failed to save credential")
 
+    if outbox is not None:
+        st.caption(f"Undelivered writes per node (pending/failed): {outbox.summary()}")
+
     # View Credentials
     st.header("Stored Credentials")
+    col_service_filter, col_username_filter = st.columns(2)
+    service_filter = col_service_filter.text_input("Filter by Service", placeholder="Leave empty to list all")
+    username_filter = col_username_filter.text_input("Filter by Username", placeholder="Leave empty to list all")
     if st.button("Refresh Credentials"):
         with st.spinner("Fetching and decrypting credentials..."):
-            # generate short-lived JTWs
-            generate_tokens.update_config()
-            credentials = fetch_credentials()
+            credentials = fetch_credentials(service_filter or None, username_filter or None)
             # print('credentials', credentials)
             if credentials:
                 df = pd.DataFrame(credentials)
@@ -120,5 +282,56 @@ def main():
             else:
                 st.info("No credentials found")
 
+    # Update or delete existing credentials
+    st.header("Manage Credentials")
+    with st.form("manage_form"):
+        cred_ids = st.text_input("Credential IDs", placeholder="One ID to update, or comma-separated IDs to delete")
+        new_password = st.text_input("New Password", type="password")
+        col_update, col_delete = st.columns(2)
+        update_clicked = col_update.form_submit_button("Update Password")
+        delete_clicked = col_delete.form_submit_button("Delete")
+
+        ids = [cred_id.strip() for cred_id in cred_ids.split(",") if cred_id.strip()]
+        if update_clicked:
+            if len(ids) != 1 or not new_password:
+                st.error("Enter exactly one ID and a new password")
+            else:
+                if update_password(ids[0], new_password):
+                    st.success("Password updated" if dedupe is None else "Password updated under a new credential ID")
+                else:
+                    st.error("Failed to update password")
+        if delete_clicked:
+            if not ids:
+                st.error("Enter at least one ID")
+            else:
+                if delete_credentials(ids):
+                    st.success(f"Deleted {len(ids)} credential(s)")
+                else:
+                    st.error("Failed to delete credentials")
+
+    # Aggregates computed on the nodes; only the summary rows are transferred
+    st.header("Vault Statistics")
+    since = st.date_input("Records created since", value=date.today() - timedelta(days=30))
+    if st.button("Load Statistics"):
+        with st.spinner("Running aggregation queries..."):
+            aggregates = default_registry(session_api(), SCHEMA_ID)
+            by_service = aggregates.run("count_by_service")
+            per_day = aggregates.run("records_per_day", {
+                "since": datetime.combine(since, datetime.min.time(), tzinfo=timezone.utc).isoformat()
+            })
+        col_service, col_day = st.columns(2)
+        with col_service:
+            st.subheader("Credentials per service")
+            if by_service:
+                st.bar_chart(pd.DataFrame(by_service).rename(columns={"_id": "service"}).set_index("service"))
+            else:
+                st.info("No credentials found")
+        with col_day:
+            st.subheader("Credentials added per day")
+            if per_day:
+                st.bar_chart(pd.DataFrame(per_day).rename(columns={"_id": "day"}).set_index("day"))
+            else:
+                st.info("No credentials in this period")
+
 if __name__ == "__main__":
     main()
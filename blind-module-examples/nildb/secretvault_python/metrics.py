@@ -0,0 +1,183 @@
+"""Latency histograms, byte/error counters and spans for NilDBAPI, exportable as Prometheus text."""
+import functools
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Finished spans kept in memory for inspection
+MAX_FINISHED_SPANS = 1000
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels.keys(), escaped)) + "}"
+
+
+class Span:
+    """A timed operation, shaped after an OpenTelemetry span."""
+
+    def __init__(self, name: str, attributes: Dict, trace_id: str, parent_id: Optional[str]):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end = None
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def as_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_s": (self.end or time.time()) - self.start,
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+
+class Metrics:
+    """Thread-safe registry of counters, histograms and spans."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._histograms: Dict[Tuple[str, Tuple], List] = {}
+        self._local = threading.local()
+        self.finished_spans: List[Span] = []
+        self.span_exporters: List[Callable[[Span], None]] = []
+
+    def inc(self, name: str, labels: Dict[str, str], value: float = 1) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: Dict[str, str], value: float) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # [bucket counts..., +Inf count, sum]
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[i] += 1
+            histogram[len(self.buckets)] += 1
+            histogram[-1] += value
+
+    def record_request(self, node_name: str, endpoint: str, seconds: float,
+                       bytes_sent: int = 0, bytes_received: int = 0,
+                       status: Optional[int] = None, error: Optional[str] = None) -> None:
+        """Record one HTTP exchange with a node."""
+        labels = {"node": node_name, "endpoint": endpoint}
+        self.observe("nildb_request_duration_seconds", labels, seconds)
+        self.inc("nildb_requests_total", labels)
+        self.inc("nildb_request_bytes_total", labels, bytes_sent)
+        self.inc("nildb_response_bytes_total", labels, bytes_received)
+        if error is not None:
+            self.inc("nildb_request_errors_total", {**labels, "code": error})
+        elif status is not None and status >= 400:
+            self.inc("nildb_request_errors_total", {**labels, "code": str(status)})
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a block as a span nested under the current thread's active span."""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        parent = stack[-1] if stack else None
+        span = Span(name, attributes, parent.trace_id if parent else uuid.uuid4().hex, parent.span_id if parent else None)
+        stack.append(span)
+        try:
+            yield span
+        except Exception as e:
+            span.status = "error"
+            span.set_attribute("exception", str(e))
+            raise
+        finally:
+            span.end = time.time()
+            stack.pop()
+            self.observe("nildb_operation_duration_seconds",
+                         {"operation": name, "node": str(attributes.get("node", ""))},
+                         span.end - span.start)
+            with self._lock:
+                self.finished_spans.append(span)
+                del self.finished_spans[:-MAX_FINISHED_SPANS]
+            for exporter in self.span_exporters:
+                exporter(span)
+
+    def render_prometheus(self) -> str:
+        """Current values in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(value) for key, value in self._histograms.items()}
+
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(dict(labels))} {value}")
+
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                labels = dict(labels)
+                for bound, count in zip(self.buckets, histogram):
+                    lines.append(f"{name}_bucket{_labels({**labels, 'le': str(bound)})} {count}")
+                lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {histogram[len(self.buckets)]}")
+                lines.append(f"{name}_sum{_labels(labels)} {histogram[-1]}")
+                lines.append(f"{name}_count{_labels(labels)} {histogram[len(self.buckets)]}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = 9464, host: str = "0.0.0.0"):
+        """Expose /metrics over HTTP on a background thread and return the server."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                body = metrics.render_prometheus().encode()
+                self.send_response(200 if self.path == "/metrics" else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# Process-wide registry used by NilDBAPI unless another one is passed in
+METRICS = Metrics()
+
+
+def traced(operation: str):
+    """Wrap a NilDBAPI method taking node_name first in a span on the instance's metrics."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, node_name, *args, **kwargs):
+            with self.metrics.span(operation, node=node_name):
+                return method(self, node_name, *args, **kwargs)
+        return wrapper
+    return decorator
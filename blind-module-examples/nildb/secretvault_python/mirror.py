@@ -0,0 +1,140 @@
+"""Local on-disk mirror of per-node encrypted shares with incremental sync."""
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from nildb_api import DEFAULT_PAGE_SIZE
+
+DEFAULT_MIRROR_PATH = ".streamlit/mirror.db"
+
+# Rows written per SQLite transaction while syncing
+WRITE_BATCH_SIZE = 1000
+
+
+class ShareMirror:
+    """SQLite copy of the records each node holds, kept current with a _updated high-water mark.
+
+    Only encrypted shares are stored; decryption still needs every node's share.
+    """
+
+    def __init__(self, path: str = DEFAULT_MIRROR_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        # Syncs run on the mirror's own threads, not the client's shared request pool
+        self.executor = ThreadPoolExecutor(thread_name_prefix="mirror")
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS shares (
+                    schema_id TEXT NOT NULL,
+                    node TEXT NOT NULL,
+                    record_id TEXT NOT NULL,
+                    updated TEXT,
+                    record TEXT NOT NULL,
+                    PRIMARY KEY (schema_id, record_id, node)
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    schema_id TEXT NOT NULL,
+                    node TEXT NOT NULL,
+                    high_water TEXT,
+                    PRIMARY KEY (schema_id, node)
+                )
+            """)
+
+    def high_water(self, schema_id: str, node_name: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT high_water FROM sync_state WHERE schema_id = ? AND node = ?",
+                (schema_id, node_name)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _write(self, schema_id: str, node_name: str, records: List[Dict], high_water: Optional[str]) -> None:
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO shares (schema_id, node, record_id, updated, record) VALUES (?, ?, ?, ?, ?)",
+                [(schema_id, node_name, record["_id"], record.get("_updated"), json.dumps(record)) for record in records]
+            )
+            if high_water is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (schema_id, node, high_water) VALUES (?, ?, ?)",
+                    (schema_id, node_name, high_water)
+                )
+
+    def sync_node(self, node_name: str, nildb_api, schema_id: str, page_size: int = DEFAULT_PAGE_SIZE) -> int:
+        """Pull records changed on one node since its high-water mark; returns how many were transferred.
+
+        The mark only advances once every page has been read; a failed page raises NodeReadError
+        and leaves it where it was, so the next sync fetches the same range again.
+        """
+        high_water = self.high_water(schema_id, node_name)
+        # $gte (not $gt) so records sharing the boundary timestamp are never skipped; upserts make repeats harmless.
+        # The paged read passes the mark as a date variable, matching how the nodes store _updated.
+        filter_dict = {"_updated": {"$gte": high_water}} if high_water else {}
+
+        count, batch, newest = 0, [], high_water
+        for record in nildb_api.data_read_iter(node_name, schema_id, filter_dict, page_size):
+            batch.append(record)
+            updated = record.get("_updated")
+            if updated is not None and (newest is None or updated > newest):
+                newest = updated
+            if len(batch) >= WRITE_BATCH_SIZE:
+                self._write(schema_id, node_name, batch, None)
+                count += len(batch)
+                batch = []
+        # pages arrive in _id order, so newest is only a safe mark once the whole range has been read
+        self._write(schema_id, node_name, batch, newest)
+        return count + len(batch)
+
+    def sync(self, nildb_api, schema_id: str, page_size: int = DEFAULT_PAGE_SIZE) -> Dict[str, int]:
+        """Incrementally sync every node concurrently."""
+        futures = {
+            node_name: self.executor.submit(self.sync_node, node_name, nildb_api, schema_id, page_size)
+            for node_name in nildb_api.nodes
+        }
+        return {node_name: future.result() for node_name, future in futures.items()}
+
+    def forget(self, schema_id: str, record_ids: Iterable[str]) -> None:
+        """Drop records that were deleted on the nodes."""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM shares WHERE schema_id = ? AND record_id = ?",
+                [(schema_id, record_id) for record_id in record_ids]
+            )
+
+    def iter_joined(self, schema_id: str, node_names: List[str],
+                    filter_dict: Optional[Dict] = None) -> Iterator[Tuple[str, List[Dict]]]:
+        """Yield (record_id, [record from each node, in node order]) for records every node holds.
+
+        filter_dict supports plain field equality, evaluated inside SQLite.
+        """
+        sql = "SELECT record_id, node, record FROM shares WHERE schema_id = ?"
+        params = [schema_id]
+        for field, value in (filter_dict or {}).items():
+            sql += " AND json_extract(record, ?) = ?"
+            params += [f"$.{field}", value]
+        sql += " ORDER BY record_id"
+
+        # A separate read connection streams rows without holding the writer lock
+        reader = sqlite3.connect(self.path)
+        try:
+            current_id, parts = None, {}
+            for record_id, node_name, record in reader.execute(sql, params):
+                if record_id != current_id:
+                    if current_id is not None and all(name in parts for name in node_names):
+                        yield current_id, [parts[name] for name in node_names]
+                    current_id, parts = record_id, {}
+                parts[node_name] = json.loads(record)
+            if current_id is not None and all(name in parts for name in node_names):
+                yield current_id, [parts[name] for name in node_names]
+        finally:
+            reader.close()
+
+    def close(self) -> None:
+        self.executor.shutdown()
+        self.conn.close()
@@ -1,105 +1,458 @@
 """NilDB API integration"""
-import requests
-from typing import Dict, List, Optional
+import copy
+import json
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import fastjson
+from metrics import METRICS, Metrics, traced
+from resilience import CircuitBreaker, NodeReadError, NodeUnavailableError
+from share_join import batched
+from transport import NodeTransport
+
+# Namespace for deterministic ids of queries this client registers on the nodes
+QUERY_NAMESPACE = uuid.UUID("5b8f2c3e-4a61-4d0b-9a57-1f0c6d2e8a94")
+
+# Records per page when reading a collection incrementally
+DEFAULT_PAGE_SIZE = 1000
+
+# Record ids per data/delete call when deleting by id batch
+DEFAULT_ID_BATCH_SIZE = 500
+
+# Default per-request latency budget in seconds; a node entry may set its own 'timeout'
+DEFAULT_TIMEOUT = 10.0
+
+# Pages buffered ahead of the consumer per node stream
+DEFAULT_PREFETCH_PAGES = 2
+
+# Records handed over at a time from an incrementally parsed response
+STREAM_CHUNK_SIZE = 256
+
+# Paged reads start after the nil uuid, which sorts before every record id
+FIRST_PAGE_AFTER = "00000000-0000-0000-0000-000000000000"
+
+# Filter operators whose value is a list of sub-filters rather than a value
+_LOGICAL_OPERATORS = ("$and", "$or", "$nor")
+
+# Query variable types for fields the nodes do not store as plain strings: schema.json coerces
+# _id to a uuid, and the node-assigned timestamps are dates
+FIELD_TYPES = {"_id": "uuid", "_created": "date", "_updated": "date"}
+
+def ids_filter(ids: List[str]) -> Dict:
+    """Filter matching a batch of record ids (coerced to the uuids the nodes store)."""
+    return {"_id": {"$in": list(ids)}, "$coerce": {"_id": "uuid"}}
+
+
+def is_duplicate_error(error) -> bool:
+    """Whether a node error reports a duplicate key, i.e. the node already holds that id.
+
+    Only the node's own message is inspected, never the rejected document echoed with it.
+    """
+    message = error.get("error", "") if isinstance(error, dict) else error
+    return "duplicate key" in str(message).lower()
+
+
+def _parameterize(filter_dict: Dict, values: Dict, declarations: Dict, field: Optional[str] = None) -> Dict:
+    """Copy of filter_dict with each value replaced by a ##fN query variable.
+
+    The values are collected into values and their variable declarations, typed after the
+    field they are compared with, into declarations.
+    """
+    template = {}
+    for key, value in filter_dict.items():
+        if key in _LOGICAL_OPERATORS:
+            template[key] = [_parameterize(clause, values, declarations) for clause in value]
+        elif key == "$coerce":
+            template[key] = value
+        elif isinstance(value, dict):
+            template[key] = _parameterize(value, values, declarations, field if key.startswith("$") else key)
+        elif value is None:
+            template[key] = None
+        else:
+            name = f"f{len(values)}"
+            values[name] = value
+            declarations[name] = _variable_declaration(field if key.startswith("$") else key, value)
+            template[key] = f"##{name}"
+    return template
+
+
+def parameterize(filter_dict: Dict) -> Tuple[Dict, Dict, Dict]:
+    """Split a filter into (template with ##fN placeholders, variable values, variable declarations).
+
+    Filters of the same shape give the same template, so a query built from it can be
+    registered once and executed with different values.
+    """
+    values, declarations = {}, {}
+    template = _parameterize(filter_dict, values, declarations)
+    return template, values, declarations
+
+
+def _variable_type(value) -> str:
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    return "string"
+
+
+def _variable_declaration(field: str, value) -> Dict:
+    """Query variable declaration for a value compared with field, in the type the nodes store it as."""
+    if isinstance(value, list):
+        item_type = FIELD_TYPES.get(field) or (_variable_type(value[0]) if value else "string")
+        return {"type": "array", "items": {"type": item_type}, "description": f"Values of {field}"}
+    return {"type": FIELD_TYPES.get(field) or _variable_type(value), "description": f"Value of {field}"}
+
+
+def _response_errors(response) -> List:
+    """The "errors" list of an error response, or [] if the body is not JSON."""
+    try:
+        return fastjson.loads(response.content).get("errors", [])
+    except Exception:
+        return []
+
+
+def _close_response(future) -> None:
+    """Done-callback releasing the connection of a hedged attempt whose answer was not used."""
+    try:
+        future.result().close()
+    except Exception:
+        pass
+
 
 class NilDBAPI:
-    def __init__(self, node_config: Dict):
+    def __init__(self, node_config: Dict,
+                 pool_connections: int = 1,
+                 pool_maxsize: int = 10,
+                 http2: bool = False,
+                 compression: Optional[str] = None,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 hedge_after: Optional[float] = None,
+                 failure_threshold: int = 3,
+                 reset_timeout: float = 30.0,
+                 metrics: Optional[Metrics] = None):
         self.nodes = node_config
-    
+        self.metrics = metrics or METRICS
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.breakers = {
+            node_name: CircuitBreaker(failure_threshold, reset_timeout)
+            for node_name in node_config
+        }
+        self._hedge_executor = ThreadPoolExecutor(thread_name_prefix="nildb-hedge") if hedge_after else None
+        self.transports = {
+            node_name: NodeTransport(
+                node['url'],
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                http2=http2,
+                compression=compression
+            )
+            for node_name, node in node_config.items()
+        }
+        self._registered_queries = set()
+        # Credentials for requests; None falls back to the 'jwt' entry of each node config
+        self.auth = None
+
+    def with_auth(self, auth) -> "NilDBAPI":
+        """Shallow view of this client that authorizes requests with auth.token(node_name).
+
+        The view shares connection pools, breakers and metrics with the original, so one
+        client can serve many sessions without any of them writing to the node config.
+        """
+        view = copy.copy(self)
+        view.auth = auth
+        return view
+
+    def _headers(self, node_name: str) -> Dict[str, str]:
+        token = self.auth.token(node_name) if self.auth is not None else self.nodes[node_name]["jwt"]
+        return {
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/json'
+        }
+
+    def _post(self, node_name: str, path: str, headers: Dict, json: Optional[dict] = None,
+              idempotent: bool = False, stream: bool = False):
+        """Send a request to the node over its pooled transport, within the node's latency budget.
+
+        Idempotent requests are hedged: if no answer arrives within hedge_after seconds a
+        second identical request is sent and whichever succeeds first is used.
+        """
+        breaker = self.breakers[node_name]
+        if not breaker.allow():
+            self.metrics.record_request(node_name, path, 0.0, error="circuit_open")
+            raise NodeUnavailableError(f"circuit open for {node_name}")
+
+        timeout = self.nodes[node_name].get('timeout') or self.timeout
+        transport = self.transports[node_name]
+        started = time.perf_counter()
+        try:
+            if idempotent and self._hedge_executor is not None:
+                response = self._hedged(transport, path, headers, json, timeout, stream)
+            else:
+                response = transport.post(path, headers=headers, json=json, timeout=timeout, stream=stream)
+        except Exception as e:
+            breaker.record_failure()
+            self.metrics.record_request(node_name, path, time.perf_counter() - started, error=type(e).__name__)
+            raise
+
+        wire_bytes = getattr(response, "wire_bytes", {})
+        self.metrics.record_request(
+            node_name, path, time.perf_counter() - started,
+            bytes_sent=wire_bytes.get("sent", 0),
+            bytes_received=wire_bytes.get("received", 0),
+            status=response.status_code
+        )
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def _hedged(self, transport: NodeTransport, path: str, headers: Dict, json: Optional[dict], timeout: float,
+                stream: bool = False):
+        """Send the request, and a second copy if the first is slower than hedge_after.
+
+        A 5xx answer counts as a failed attempt while the other may still succeed; the response
+        that is not used is closed so a streamed body does not keep its pooled connection.
+        """
+        attempts = [self._hedge_executor.submit(transport.post, path, headers=headers, json=json,
+                                                timeout=timeout, stream=stream)]
+        try:
+            return attempts[0].result(timeout=self.hedge_after)
+        except TimeoutError:
+            attempts.append(self._hedge_executor.submit(transport.post, path, headers=headers, json=json,
+                                                        timeout=timeout, stream=stream))
+
+        pending = set(attempts)
+        fallback, error = None, None
+        for attempt in as_completed(attempts, timeout=timeout):
+            pending.discard(attempt)
+            try:
+                response = attempt.result()
+            except Exception as e:
+                error = e
+                continue
+            if response.status_code < 500:
+                if fallback is not None:
+                    fallback.close()
+                for other in pending:
+                    other.add_done_callback(_close_response)
+                return response
+            if fallback is None:
+                fallback = response
+            else:
+                response.close()
+        if fallback is not None:
+            return fallback
+        raise error
+
+    def node_health(self) -> Dict[str, str]:
+        """Circuit state per node."""
+        return {node_name: breaker.state for node_name, breaker in self.breakers.items()}
+
+    def transport_stats(self) -> Dict[str, Dict]:
+        """Per-node connection reuse and bytes-on-wire statistics."""
+        return {node_name: transport.stats() for node_name, transport in self.transports.items()}
+
+    def close(self) -> None:
+        for transport in self.transports.values():
+            transport.close()
+
     def data_upload(self, node_name: str, schema_id: str, payload: list) -> bool:
-        """Create/upload records in the specified node and schema."""
+        """Create/upload records in the specified node and schema.
+
+        True once the node holds every record; a duplicate-key error means an earlier attempt already stored it.
+        """
+        result = self.data_create(node_name, schema_id, payload)
+        return result is not None and all(is_duplicate_error(error) for error in result.get("errors", []))
+
+    @traced("data_upload")
+    def data_create(self, node_name: str, schema_id: str, payload: list) -> Optional[Dict]:
+        """Create records and return the node's {"created": [...], "errors": [...]} report, or None on failure."""
         try:
-            node = self.nodes[node_name]
-            headers = {
-                'Authorization': f'Bearer {node["jwt"]}',
-                'Content-Type': 'application/json'
-            }
+            headers = self._headers(node_name)
             
             body = {
                 "schema": schema_id,
                 "data": payload
             }
 
-            response = requests.post(
-                f"{node['url']}/api/v1/data/create",
+            response = self._post(
+                node_name,
+                "/api/v1/data/create",
                 headers=headers,
                 json=body
             )
             
-            return response.status_code == 200 and response.json().get("data", {}).get("errors", []) == []
+            if response.status_code == 200:
+                return fastjson.loads(response.content).get("data", {})
+            print(f"Failed to create records in {node_name}: {response.status_code} {response.text}")
+            return None
         except Exception as e:
             print(f"Error creating records in {node_name}: {str(e)}")
-            return False
+            return None
 
+    @traced("data_read")
     def data_read(self, node_name: str, schema_id: str, filter_dict: Optional[dict] = None) -> List[Dict]:
         """Read data from the specified node and schema."""
         try:
-            node = self.nodes[node_name]
-            headers = {
-                'Authorization': f'Bearer {node["jwt"]}',
-                'Content-Type': 'application/json'
-            }
+            headers = self._headers(node_name)
             
             body = {
                 "schema": schema_id,
                 "filter": filter_dict if filter_dict is not None else {}
             }
             
-            response = requests.post(
-                f"{node['url']}/api/v1/data/read",
+            response = self._post(
+                node_name,
+                "/api/v1/data/read",
                 headers=headers,
-                json=body
+                json=body,
+                idempotent=True
             )
             
             if response.status_code == 200:
-                return response.json().get("data", [])
+                return fastjson.loads(response.content).get("data", [])
             return []
         except Exception as e:
             print(f"Error reading data from {node_name}: {str(e)}")
             return []
 
-    def query_execute(self, node_name: str, query_id: str, variables: Optional[dict] = None) -> List[Dict]:
-        """Execute a query on the specified node with advanced filtering."""
+    def data_read_stream(self, node_name: str, schema_id: str, filter_dict: Optional[dict] = None) -> Iterator[Dict]:
+        """Read data from the specified node and schema, yielding records as they are parsed off the response.
+
+        Raises NodeReadError if the node fails, including part way through the body.
+        """
         try:
-            node = self.nodes[node_name]
-            headers = {
-                'Authorization': f'Bearer {node["jwt"]}',
-                'Content-Type': 'application/json'
+            headers = self._headers(node_name)
+
+            body = {
+                "schema": schema_id,
+                "filter": filter_dict if filter_dict is not None else {}
             }
 
+            response = self._post(
+                node_name,
+                "/api/v1/data/read",
+                headers=headers,
+                json=body,
+                idempotent=True,
+                stream=True
+            )
+        except Exception as e:
+            raise NodeReadError(f"Error reading data from {node_name}: {str(e)}") from e
+
+        if response.status_code != 200:
+            response.close()
+            raise NodeReadError(f"Error reading data from {node_name}: {response.status_code}")
+        try:
+            yield from self.transports[node_name].iter_records(response)
+        except Exception as e:
+            raise NodeReadError(f"Error reading data from {node_name}: {str(e)}") from e
+
+    def _execute_query(self, node_name: str, query_id: str, variables: Optional[dict] = None) -> List[Dict]:
+        """Execute a query on the specified node, raising NodeReadError if it does not answer with data."""
+        try:
+            headers = self._headers(node_name)
+
             payload = {
                 "id": query_id,
                 "variables": variables if variables is not None else {}
             }
 
-            response = requests.post(
-                f"{node['url']}/api/v1/queries/execute",
+            response = self._post(
+                node_name,
+                "/api/v1/queries/execute",
                 headers=headers,
-                json=payload
+                json=payload,
+                idempotent=True
             )
+        except Exception as e:
+            raise NodeReadError(f"Error executing query on {node_name}: {str(e)}") from e
 
-            if response.status_code == 200:
-                return response.json().get("data", [])
+        if response.status_code != 200:
+            raise NodeReadError(f"Error executing query on {node_name}: {response.status_code} {response.text}")
+        return fastjson.loads(response.content).get("data", [])
+
+    @traced("query_execute")
+    def query_execute(self, node_name: str, query_id: str, variables: Optional[dict] = None) -> List[Dict]:
+        """Execute a query on the specified node with advanced filtering."""
+        try:
+            return self._execute_query(node_name, query_id, variables)
+        except NodeReadError as e:
+            print(str(e))
             return []
+
+    def _data_write(self, node_name: str, path: str, body: dict, action: str) -> Optional[Dict]:
+        try:
+            headers = self._headers(node_name)
+
+            response = self._post(
+                node_name,
+                path,
+                headers=headers,
+                json=body
+            )
+
+            if response.status_code == 200:
+                return fastjson.loads(response.content).get("data", {})
+            print(f"Failed to {action} records in {node_name}: {response.status_code} {response.text}")
+            return None
         except Exception as e:
-            print(f"Error executing query on {node_name}: {str(e)}")
-            return []
+            print(f"Error trying to {action} records in {node_name}: {str(e)}")
+            return None
+
+    @traced("data_update")
+    def data_update(self, node_name: str, schema_id: str, filter_dict: dict, update: dict) -> Optional[Dict]:
+        """Update matching records in place (e.g. {"$set": {...}}); returns the node's report or None."""
+        return self._data_write(node_name, "/api/v1/data/update", {
+            "schema": schema_id,
+            "filter": filter_dict,
+            "update": update
+        }, "update")
+
+    @traced("data_delete")
+    def data_delete(self, node_name: str, schema_id: str, filter_dict: dict) -> Optional[Dict]:
+        """Delete matching records; returns the node's report or None."""
+        if not filter_dict:
+            print(f"Refusing to delete from {node_name} with an empty filter; use data_flush instead.")
+            return None
+        return self._data_write(node_name, "/api/v1/data/delete", {
+            "schema": schema_id,
+            "filter": filter_dict
+        }, "delete")
+
+    def data_delete_ids(self, node_name: str, schema_id: str, ids: List[str],
+                        batch_size: int = DEFAULT_ID_BATCH_SIZE) -> bool:
+        """Delete records by id, batch_size ids per request."""
+        ids = list(ids)
+        success = True
+        for start in range(0, len(ids), batch_size):
+            if self.data_delete(node_name, schema_id, ids_filter(ids[start:start + batch_size])) is None:
+                success = False
+        return success
+
+    @traced("data_flush")
+    def data_flush(self, node_name: str, schema_id: str) -> Optional[Dict]:
+        """Delete every record in the schema; returns the node's report or None."""
+        return self._data_write(node_name, "/api/v1/data/flush", {"schema": schema_id}, "flush")
 
     def create_schema(self, node_name: str, payload: dict = None) -> bool:
         """Create a schema in the specified node."""
         try:
-            node = self.nodes[node_name]
-            headers = {
-                'Authorization': f'Bearer {node["jwt"]}',
-                'Content-Type': 'application/json'
-            }
-            response = requests.post(
-                f"{node['url']}/api/v1/schemas",
+            headers = self._headers(node_name)
+            response = self._post(
+                node_name,
+                "/api/v1/schemas",
                 headers=headers,
                 json=payload if payload is not None else {}
             )
 
-            if response.ok:
+            if 200 <= response.status_code < 300:
                 print(f"Schema created successfully on {node_name}.")
                 return True
             else:
@@ -111,23 +464,23 @@ class NilDBAPI:
             return False
 
     def create_query(self, node_name: str, payload: dict = {}) -> bool:
-        """Create a query in the specified node."""
+        """Create a query in the specified node; an id the node already holds counts as created."""
         try:
-            node = self.nodes[node_name]
-            headers = {
-                'Authorization': f'Bearer {node["jwt"]}',
-                'Content-Type': 'application/json'
-            }
+            headers = self._headers(node_name)
 
-            response = requests.post(
-                f"{node['url']}/api/v1/queries",
+            response = self._post(
+                node_name,
+                "/api/v1/queries",
                 headers=headers,
                 json=payload if payload is not None else {}
             )
 
-            if response.ok:
+            if 200 <= response.status_code < 300:
                 print(f"Query created successfully on {node_name}.")
                 return True
+            elif any(is_duplicate_error(error) for error in _response_errors(response)):
+                # registered earlier, by this client before a restart or by another one
+                return True
             else:
                 print(f"Failed to create query in {node_name}: {response.status_code} {response.text}")
                 return False
@@ -135,3 +488,214 @@ class NilDBAPI:
         except Exception as e:
             print(f"Error creating query in {node_name}: {str(e)}")
             return False
+
+    def ensure_query(self, node_name: str, payload: dict) -> bool:
+        """Create a query on the node unless this client already registered it."""
+        key = (node_name, payload["_id"])
+        if key in self._registered_queries:
+            return True
+        if self.create_query(node_name, payload):
+            self._registered_queries.add(key)
+            return True
+        return False
+
+    def data_read_pages(self, node_name: str, schema_id: str,
+                        filter_dict: Optional[dict] = None,
+                        page_size: int = DEFAULT_PAGE_SIZE,
+                        projection: Optional[List[str]] = None) -> Iterator[List[Dict]]:
+        """Read data from the specified node and schema one page at a time, ordered by _id.
+
+        Each page resumes after the last _id of the previous one, and the filter's values are
+        passed as query variables, so every filter of the same shape shares one registered
+        query. If projection is given, the node returns only those fields (and _id).
+        Raises NodeReadError if a page cannot be read.
+        """
+        template, values, variables = parameterize(filter_dict if filter_dict is not None else {})
+        after = {"_id": {"$gt": "##after"}}
+        pipeline = [
+            {"$match": {"$and": [template, after]} if template else after},
+            {"$sort": {"_id": 1}},
+            {"$limit": page_size}
+        ]
+        if projection:
+            pipeline.append({"$project": {field: 1 for field in projection}})
+
+        query_id = str(uuid.uuid5(
+            QUERY_NAMESPACE,
+            json.dumps(["page", schema_id, pipeline], sort_keys=True)
+        ))
+        variables["after"] = {"type": FIELD_TYPES["_id"], "description": "Last _id of the previous page"}
+        self.ensure_query(node_name, {
+            "_id": query_id,
+            "name": f"page {page_size}",
+            "schema": schema_id,
+            "variables": variables,
+            "pipeline": pipeline
+        })
+
+        after_id = FIRST_PAGE_AFTER
+        while True:
+            page = self._execute_query(node_name, query_id, {**values, "after": after_id})
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            after_id = page[-1]["_id"]
+
+    def data_read_iter(self, node_name: str, schema_id: str,
+                       filter_dict: Optional[dict] = None,
+                       page_size: int = DEFAULT_PAGE_SIZE,
+                       projection: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Read data from the specified node and schema as a stream of records."""
+        for page in self.data_read_pages(node_name, schema_id, filter_dict, page_size, projection):
+            yield from page
+
+    def data_select(self, node_name: str, schema_id: str, query) -> List[Dict]:
+        """Run a query_builder query on the node, pushing its filter and projection down.
+
+        The filter's values travel as query variables, so one registered query serves every
+        lookup of the same shape.
+        """
+        if not query.projection():
+            return self.data_read(node_name, schema_id, query.filter())
+        payload = query.query_payload(schema_id)
+        self.ensure_query(node_name, payload)
+        return self.query_execute(node_name, payload["_id"], query.variables())
+
+
+class ConcurrentNilDBAPI(NilDBAPI):
+    """NilDBAPI variant that sends one request to every node at the same time."""
+
+    def __init__(self, node_config: Dict, max_workers: Optional[int] = None, **transport_options):
+        super().__init__(node_config, **transport_options)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or len(node_config),
+            thread_name_prefix="nildb"
+        )
+
+    def with_executor(self, max_workers: Optional[int] = None, thread_name_prefix: str = "nildb") -> "ConcurrentNilDBAPI":
+        """Shallow view of this client that fans out on its own thread pool (one thread per node by default).
+
+        Long-running background work (outbox delivery, mirror syncs) uses such a view so it cannot
+        occupy the workers that interactive requests wait on.
+        """
+        view = copy.copy(self)
+        view.executor = ThreadPoolExecutor(
+            max_workers=max_workers or len(self.nodes),
+            thread_name_prefix=thread_name_prefix
+        )
+        return view
+
+    def fan_out(self, fn: Callable, *args, node_names: Optional[List[str]] = None, **kwargs) -> Dict:
+        """Call fn(node_name, *args, **kwargs) on every node concurrently and collect per-node results."""
+        node_names = list(self.nodes.keys()) if node_names is None else node_names
+        futures = {
+            node_name: self.executor.submit(fn, node_name, *args, **kwargs)
+            for node_name in node_names
+        }
+        return {node_name: future.result() for node_name, future in futures.items()}
+
+    def data_upload_all(self, schema_id: str, payloads: Dict[str, list]) -> Dict[str, bool]:
+        """Upload a (per-node) payload to every node concurrently."""
+        futures = {
+            node_name: self.executor.submit(self.data_upload, node_name, schema_id, payload)
+            for node_name, payload in payloads.items()
+        }
+        return {node_name: future.result() for node_name, future in futures.items()}
+
+    def data_update_all(self, schema_id: str, updates: Dict[str, tuple]) -> Dict[str, Optional[Dict]]:
+        """Apply a per-node (filter, update) pair on every listed node concurrently."""
+        futures = {
+            node_name: self.executor.submit(self.data_update, node_name, schema_id, filter_dict, update)
+            for node_name, (filter_dict, update) in updates.items()
+        }
+        return {node_name: future.result() for node_name, future in futures.items()}
+
+    def data_delete_all(self, schema_id: str, filter_dict: dict) -> Dict[str, Optional[Dict]]:
+        """Delete matching records on every node concurrently."""
+        return self.fan_out(self.data_delete, schema_id, filter_dict)
+
+    def data_delete_ids_all(self, schema_id: str, ids: List[str],
+                            batch_size: int = DEFAULT_ID_BATCH_SIZE) -> Dict[str, bool]:
+        """Delete records by id batch on every node concurrently."""
+        return self.fan_out(self.data_delete_ids, schema_id, list(ids), batch_size)
+
+    def data_flush_all(self, schema_id: str) -> Dict[str, Optional[Dict]]:
+        """Delete every record in the schema on every node concurrently."""
+        return self.fan_out(self.data_flush, schema_id)
+
+    def data_read_all(self, schema_id: str, filter_dict: Optional[dict] = None) -> Dict[str, List[Dict]]:
+        """Read data from every node concurrently."""
+        return self.fan_out(self.data_read, schema_id, filter_dict)
+
+    def query_execute_all(self, query_id: str, variables: Optional[dict] = None) -> Dict[str, List[Dict]]:
+        """Execute a query on every node concurrently."""
+        return self.fan_out(self.query_execute, query_id, variables)
+
+    def data_select_all(self, schema_id: str, query) -> Dict[str, List[Dict]]:
+        """Run a query_builder query on every node concurrently."""
+        return self.fan_out(self.data_select, schema_id, query)
+
+    def data_read_streams(self, schema_id: str,
+                          filter_dict: Optional[dict] = None,
+                          page_size: Optional[int] = DEFAULT_PAGE_SIZE,
+                          prefetch_pages: int = DEFAULT_PREFETCH_PAGES,
+                          projection: Optional[List[str]] = None) -> Dict[str, Iterator[Dict]]:
+        """Open a record stream per node; pages are fetched in the background, a few ahead.
+
+        With page_size=None each node is read with a single data/read request whose body is
+        parsed incrementally (projection does not apply in that mode).
+        """
+        streams = {}
+        for node_name in self.nodes:
+            if page_size is None:
+                pages = batched(self.data_read_stream(node_name, schema_id, filter_dict), STREAM_CHUNK_SIZE)
+            else:
+                pages = self.data_read_pages(node_name, schema_id, filter_dict, page_size, projection)
+            streams[node_name] = self._prefetch(pages, prefetch_pages)
+        return streams
+
+    @staticmethod
+    def _prefetch(pages: Iterator[List[Dict]], prefetch_pages: int) -> Iterator[Dict]:
+        """Pull pages on a background thread into a bounded buffer and yield their records.
+
+        An error raised while reading pages is re-raised to the consumer once the buffered pages are used up.
+        """
+        buffer = queue.Queue(maxsize=prefetch_pages)
+        stop = threading.Event()
+        done = object()
+        failure = []
+
+        def produce():
+            try:
+                for page in pages:
+                    while not stop.is_set():
+                        try:
+                            buffer.put(page, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        return
+            except Exception as e:
+                # handed to the consumer, so a failed read never looks like the end of the stream
+                failure.append(e)
+            finally:
+                while not stop.is_set():
+                    try:
+                        buffer.put(done, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+
+        threading.Thread(target=produce, daemon=True).start()
+        try:
+            while True:
+                page = buffer.get()
+                if page is done:
+                    if failure:
+                        raise failure[0]
+                    return
+                yield from page
+        finally:
+            stop.set()
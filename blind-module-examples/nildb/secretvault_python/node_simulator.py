@@ -0,0 +1,384 @@
+"""In-process stand-in for a nilDB node, for offline testing and benchmarking."""
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import codec
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _coerce(value, type_name: Optional[str]):
+    """Convert a JSON value to the type a node stores it as ("uuid" or "date"); others pass through.
+
+    Like a real node, the simulator keeps _id as a uuid and timestamps as dates, so a filter
+    that compares them with plain strings matches nothing here either.
+    """
+    if isinstance(value, list):
+        return [_coerce(item, type_name) for item in value]
+    if type_name == "uuid" and isinstance(value, str):
+        return uuid.UUID(value)
+    if type_name == "date" and isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value
+
+
+def _coerce_condition(condition, type_name: Optional[str]):
+    if type_name is None:
+        return condition
+    if isinstance(condition, dict):
+        return {op: _coerce(operand, type_name) for op, operand in condition.items()}
+    return _coerce(condition, type_name)
+
+
+def _coerce_variables(variables: Dict, declarations: Dict) -> Dict:
+    """Query variables converted to the types their declarations name."""
+    coerced = {}
+    for name, value in variables.items():
+        spec = declarations.get(name, {})
+        if spec.get("type") == "array":
+            coerced[name] = _coerce(value, spec.get("items", {}).get("type"))
+        else:
+            coerced[name] = _coerce(value, spec.get("type"))
+    return coerced
+
+
+def _json_default(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _get(record: Dict, path: str):
+    value = record
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _compare(value, condition) -> bool:
+    if not isinstance(condition, dict) or not any(key.startswith("$") for key in condition):
+        return value == condition
+    for op, operand in condition.items():
+        try:
+            if op == "$eq" and not value == operand:
+                return False
+            if op == "$ne" and not value != operand:
+                return False
+            if op == "$in" and value not in operand:
+                return False
+            if op == "$nin" and value in operand:
+                return False
+            if op == "$gt" and not (value is not None and value > operand):
+                return False
+            if op == "$gte" and not (value is not None and value >= operand):
+                return False
+            if op == "$lt" and not (value is not None and value < operand):
+                return False
+            if op == "$lte" and not (value is not None and value <= operand):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def matches(record: Dict, filter_dict: Optional[Dict]) -> bool:
+    """Evaluate the subset of MongoDB filter syntax the app uses, including $coerce."""
+    filter_dict = dict(filter_dict or {})
+    coercions = filter_dict.pop("$coerce", {})
+    for field, condition in filter_dict.items():
+        if field == "$and":
+            if not all(matches(record, sub) for sub in condition):
+                return False
+        elif field == "$or":
+            if not any(matches(record, sub) for sub in condition):
+                return False
+        elif not _compare(_get(record, field), _coerce_condition(condition, coercions.get(field))):
+            return False
+    return True
+
+
+def _substitute(value, variables: Dict):
+    """Replace "##name" placeholders with query variables."""
+    if isinstance(value, str) and value.startswith("##"):
+        return variables[value[2:]]
+    if isinstance(value, dict):
+        return {key: _substitute(item, variables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_substitute(item, variables) for item in value]
+    return value
+
+
+def _evaluate(expression, record: Dict):
+    if isinstance(expression, str) and expression.startswith("$"):
+        return _get(record, expression[1:])
+    if isinstance(expression, dict) and "$dateToString" in expression:
+        spec = expression["$dateToString"]
+        value = _evaluate(spec["date"], record)
+        if not isinstance(value, datetime):
+            return None
+        return value.strftime(spec.get("format", "%Y-%m-%dT%H:%M:%S"))
+    if isinstance(expression, dict):
+        return {key: _evaluate(item, record) for key, item in expression.items()}
+    return expression
+
+
+def _sort_key(value):
+    """Order numbers numerically and everything else as text."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value, "")
+    return (1, 0, str(value))
+
+
+def _group(records: List[Dict], spec: Dict) -> List[Dict]:
+    groups = {}
+    for record in records:
+        key = _evaluate(spec["_id"], record)
+        group_key = json.dumps(key, sort_keys=True, default=str)
+        group = groups.setdefault(group_key, {"_id": key})
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (op, expression), = accumulator.items()
+            value = _evaluate(expression, record)
+            if op == "$sum":
+                group[field] = group.get(field, 0) + (value if isinstance(value, (int, float)) else 0)
+            elif op == "$push":
+                group.setdefault(field, []).append(value)
+            elif op == "$first":
+                group.setdefault(field, value)
+            elif op == "$last":
+                group[field] = value
+    return list(groups.values())
+
+
+def run_pipeline(records: List[Dict], pipeline: List[Dict]) -> List[Dict]:
+    """Evaluate the subset of aggregation stages the app uses."""
+    for stage in pipeline:
+        (op, spec), = stage.items()
+        if op == "$match":
+            records = [record for record in records if matches(record, spec)]
+        elif op == "$sort":
+            for field, direction in reversed(list(spec.items())):
+                records = sorted(records, key=lambda r: _sort_key(_get(r, field)), reverse=direction < 0)
+        elif op == "$skip":
+            records = records[int(spec):]
+        elif op == "$limit":
+            records = records[:int(spec)]
+        elif op == "$project":
+            keep = [field for field, include in spec.items() if include]
+            records = [
+                {"_id": record.get("_id"), **{field: _get(record, field) for field in keep if field in record}}
+                for record in records
+            ]
+        elif op == "$group":
+            records = _group(records, spec)
+        elif op == "$count":
+            records = [{spec: len(records)}]
+        else:
+            raise ValueError(f"Unsupported pipeline stage {op}")
+    return records
+
+
+class NodeState:
+    """Schemas, records and queries held by one simulated node."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.schemas: Dict[str, Dict] = {}
+        self.queries: Dict[str, Dict] = {}
+        self.data: Dict[str, Dict[str, Dict]] = {}
+
+    def create_schema(self, body: Dict) -> Dict:
+        with self.lock:
+            self.schemas[body["_id"]] = body
+            self.data.setdefault(body["_id"], {})
+        return {"data": body["_id"]}
+
+    def create_records(self, body: Dict) -> Dict:
+        created, errors = [], []
+        now = _now()
+        with self.lock:
+            collection = self.data.setdefault(body["schema"], {})
+            for record in body.get("data", []):
+                try:
+                    record_id = _coerce(record["_id"], "uuid")
+                except (KeyError, ValueError):
+                    errors.append({"error": "_id must be a uuid", "document": record})
+                    continue
+                if str(record_id) in collection:
+                    errors.append({"error": "duplicate key", "document": record})
+                    continue
+                collection[str(record_id)] = {**record, "_id": record_id, "_created": now, "_updated": now}
+                created.append(str(record_id))
+        return {"data": {"created": created, "errors": errors}}
+
+    def read_records(self, body: Dict) -> Dict:
+        with self.lock:
+            records = list(self.data.get(body["schema"], {}).values())
+        return {"data": [record for record in records if matches(record, body.get("filter"))]}
+
+    def update_records(self, body: Dict) -> Dict:
+        now = _now()
+        matched = modified = 0
+        with self.lock:
+            for record in self.data.get(body["schema"], {}).values():
+                if not matches(record, body.get("filter")):
+                    continue
+                matched += 1
+                changes = body.get("update", {}).get("$set", {})
+                if any(record.get(field) != value for field, value in changes.items()):
+                    record.update(changes)
+                    record["_updated"] = now
+                    modified += 1
+        return {"data": {"matched": matched, "modified": modified}}
+
+    def delete_records(self, body: Dict) -> Dict:
+        if not body.get("filter"):
+            raise ValueError("filter must not be empty")
+        with self.lock:
+            collection = self.data.get(body["schema"], {})
+            doomed = [record_id for record_id, record in collection.items() if matches(record, body["filter"])]
+            for record_id in doomed:
+                del collection[record_id]
+        return {"data": {"deletedCount": len(doomed)}}
+
+    def flush_records(self, body: Dict) -> Dict:
+        with self.lock:
+            count = len(self.data.get(body["schema"], {}))
+            self.data[body["schema"]] = {}
+        return {"data": {"deletedCount": count}}
+
+    def create_query(self, body: Dict) -> Dict:
+        with self.lock:
+            if body["_id"] in self.queries:
+                raise ValueError(f"duplicate key: query {body['_id']} already exists")
+            self.queries[body["_id"]] = body
+        return {"data": body["_id"]}
+
+    def execute_query(self, body: Dict) -> Dict:
+        with self.lock:
+            query = self.queries[body["id"]]
+            records = list(self.data.get(query["schema"], {}).values())
+        variables = _coerce_variables(body.get("variables") or {}, query.get("variables") or {})
+        pipeline = _substitute(query["pipeline"], variables)
+        return {"data": run_pipeline(records, pipeline)}
+
+
+class SimulatedNode:
+    """HTTP server speaking the nilDB endpoints the app uses, with injectable latency and failures.
+
+    latency/jitter:    seconds added to every request (uniformly jittered)
+    error_rate:        fraction of requests answered with HTTP 500
+    max_payload_bytes: request bodies above this size are rejected with HTTP 413
+    """
+
+    def __init__(self,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 error_rate: float = 0.0,
+                 max_payload_bytes: Optional[int] = None,
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.max_payload_bytes = max_payload_bytes
+        self.state = NodeState()
+        self.requests = 0
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def routes(self) -> Dict:
+        return {
+            "/api/v1/schemas": self.state.create_schema,
+            "/api/v1/data/create": self.state.create_records,
+            "/api/v1/data/read": self.state.read_records,
+            "/api/v1/data/update": self.state.update_records,
+            "/api/v1/data/delete": self.state.delete_records,
+            "/api/v1/data/flush": self.state.flush_records,
+            "/api/v1/queries": self.state.create_query,
+            "/api/v1/queries/execute": self.state.execute_query,
+        }
+
+    def _handler(self):
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, payload: Dict) -> None:
+                body = json.dumps(payload, default=_json_default).encode()
+                accepted = [coding.strip() for coding in self.headers.get("Accept-Encoding", "").split(",")]
+                encoding = next((coding for coding in codec.supported_compressions() if coding in accepted), None)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if encoding:
+                    body = codec.compress(body, encoding)
+                    self.send_header("Content-Encoding", encoding)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                node.requests += 1
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length)
+
+                delay = node.latency + random.uniform(0, node.jitter)
+                if delay:
+                    time.sleep(delay)
+                if node.max_payload_bytes is not None and length > node.max_payload_bytes:
+                    return self._reply(413, {"errors": ["payload too large"]})
+                if node.error_rate and random.random() < node.error_rate:
+                    return self._reply(500, {"errors": ["injected failure"]})
+
+                route = node.routes().get(self.path)
+                if route is None:
+                    return self._reply(404, {"errors": [f"unknown path {self.path}"]})
+                try:
+                    raw = codec.decompress(raw, self.headers.get("Content-Encoding"))
+                    return self._reply(200, route(json.loads(raw or b"{}")))
+                except Exception as e:
+                    return self._reply(400, {"errors": [str(e)]})
+
+        return Handler
+
+    def start(self) -> "SimulatedNode":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def simulated_cluster(node_names: List[str], **options) -> tuple:
+    """Start one simulated node per name and return (nodes, node_config) for NilDBAPI."""
+    nodes = {node_name: SimulatedNode(**options).start() for node_name in node_names}
+    node_config = {
+        node_name: {"url": node.url, "did": f"did:nil:sim:{node_name}", "jwt": "simulated"}
+        for node_name, node in nodes.items()
+    }
+    return nodes, node_config
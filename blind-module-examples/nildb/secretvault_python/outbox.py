@@ -0,0 +1,217 @@
+"""Durable outbox that delivers per-node credential writes in the background."""
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from nildb_api import is_duplicate_error
+
+DEFAULT_OUTBOX_PATH = ".streamlit/outbox.db"
+
+# Records sent to a node per data/create call
+DEFAULT_BATCH_SIZE = 500
+
+# Retry backoff bounds in seconds
+MIN_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+# Delivery attempts per row before it is marked failed and no longer retried
+MAX_ATTEMPTS = 10
+
+# Seconds delivered rows are kept (for status()) before the worker purges them
+ACKED_RETENTION = 3600.0
+
+# Seconds between purges of delivered rows
+PURGE_INTERVAL = 300.0
+
+PENDING = "pending"
+ACKED = "acked"
+FAILED = "failed"
+
+
+class Outbox:
+    """Records pending per-node writes on disk and retries them until every node has acknowledged.
+
+    enqueue() commits the writes locally and returns at once; a background worker batches
+    pending rows per node, uploads them and marks each row acked. Failed rows back off
+    exponentially and stay pending, so a record becomes readable once every node has its share
+    even if some nodes were flaky at write time. A row still failing after max_attempts
+    deliveries (e.g. one the node's schema rejects) is marked failed and left for inspection;
+    acked rows are purged by the worker after ACKED_RETENTION seconds.
+
+    on_acked(schema_id, node_name, record_ids) is called with the records a node acknowledged,
+    e.g. DigestIndex.mark.
+    """
+
+    def __init__(self,
+                 nildb_api,
+                 path: str = DEFAULT_OUTBOX_PATH,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 poll_interval: float = 1.0,
+                 max_attempts: int = MAX_ATTEMPTS,
+                 before_flush: Optional[Callable[[], None]] = None,
+                 on_acked: Optional[Callable[[str, str, List[str]], None]] = None):
+        self.nildb_api = nildb_api
+        self.path = path
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.before_flush = before_flush
+        self.on_acked = on_acked
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    record_id TEXT NOT NULL,
+                    schema_id TEXT NOT NULL,
+                    node TEXT NOT NULL,
+                    record TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt REAL NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    created REAL NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (status, node, next_attempt)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS outbox_record ON outbox (record_id)")
+
+    def enqueue(self, schema_id: str, node_payloads: Dict[str, List[Dict]]) -> None:
+        """Durably record one write per node and record; delivery happens in the background."""
+        now = time.time()
+        rows = [
+            (record["_id"], schema_id, node_name, json.dumps(record), PENDING, now)
+            for node_name, records in node_payloads.items()
+            for record in records
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO outbox (record_id, schema_id, node, record, status, created) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        self._wake.set()
+
+    def _due(self, node_name: str) -> List[tuple]:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT id, schema_id, record, attempts FROM outbox "
+                "WHERE status = ? AND node = ? AND next_attempt <= ? ORDER BY id LIMIT ?",
+                (PENDING, node_name, time.time(), self.batch_size)
+            ).fetchall()
+
+    def _settle(self, acked: List[int], failed: List[tuple]) -> None:
+        with self._lock, self.conn:
+            self.conn.executemany("UPDATE outbox SET status = ?, last_error = NULL WHERE id = ?",
+                                  [(ACKED, row_id) for row_id in acked])
+            self.conn.executemany(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                [
+                    (FAILED if attempts + 1 >= self.max_attempts else PENDING, attempts + 1,
+                     time.time() + min(MIN_BACKOFF * 2 ** attempts, MAX_BACKOFF), error, row_id)
+                    for row_id, attempts, error in failed
+                ]
+            )
+
+    def flush_node(self, node_name: str) -> int:
+        """Deliver one batch of due writes to a node; returns how many were acknowledged."""
+        rows = self._due(node_name)
+        by_schema = {}
+        for row_id, schema_id, record, attempts in rows:
+            by_schema.setdefault(schema_id, []).append((row_id, json.loads(record), attempts))
+
+        acked, failed = [], []
+        for schema_id, entries in by_schema.items():
+            result = self.nildb_api.data_create(node_name, schema_id, [record for _, record, _ in entries])
+            if result is None:
+                failed += [(row_id, attempts, "request failed") for row_id, _, attempts in entries]
+                continue
+
+            # a record is delivered if the node created it now or already held it from an earlier attempt
+            delivered = set(result.get("created", []))
+            errors = {}
+            for error in result.get("errors", []):
+                record_id = (error.get("document") or {}).get("_id")
+                if is_duplicate_error(error):
+                    delivered.add(record_id)
+                else:
+                    errors[record_id] = json.dumps(error)
+            for row_id, record, attempts in entries:
+                if record["_id"] in delivered:
+                    acked.append(row_id)
+                else:
+                    failed.append((row_id, attempts, errors.get(record["_id"], "not created")))
+            if self.on_acked is not None:
+                self.on_acked(schema_id, node_name, [record["_id"] for _, record, _ in entries
+                                                     if record["_id"] in delivered])
+
+        self._settle(acked, failed)
+        return len(acked)
+
+    def flush_once(self) -> Dict[str, int]:
+        """Deliver one batch per node, to all nodes concurrently when the API supports it."""
+        if self.before_flush is not None:
+            self.before_flush()
+        if hasattr(self.nildb_api, "fan_out"):
+            return self.nildb_api.fan_out(self.flush_node)
+        return {node_name: self.flush_node(node_name) for node_name in self.nildb_api.nodes}
+
+    def _run(self) -> None:
+        last_purge = time.time()
+        while not self._stop.is_set():
+            try:
+                delivered = self.flush_once()
+                if time.time() - last_purge >= PURGE_INTERVAL:
+                    self.purge_acked(ACKED_RETENTION)
+                    last_purge = time.time()
+            except Exception as e:
+                print(f"Error flushing outbox: {str(e)}")
+                delivered = {}
+            # keep draining while there is work, otherwise sleep until woken or polled
+            if not any(delivered.values()):
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def start(self) -> "Outbox":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="outbox", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def status(self, record_id: str) -> Dict[str, str]:
+        """Delivery status of one record per node."""
+        with self._lock:
+            rows = self.conn.execute("SELECT node, status FROM outbox WHERE record_id = ?", (record_id,)).fetchall()
+        return dict(rows)
+
+    def summary(self, statuses: tuple = (PENDING, FAILED)) -> Dict[str, Dict[str, int]]:
+        """Row counts per node and status, for the given statuses (undelivered rows by default)."""
+        marks = ",".join("?" * len(statuses))
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT node, status, COUNT(*) FROM outbox WHERE status IN ({marks}) GROUP BY node, status",
+                list(statuses)
+            ).fetchall()
+        summary = {}
+        for node_name, status, count in rows:
+            summary.setdefault(node_name, {})[status] = count
+        return summary
+
+    def purge_acked(self, older_than: float = ACKED_RETENTION) -> None:
+        """Drop delivered rows older than older_than seconds."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM outbox WHERE status = ? AND created < ?", (ACKED, time.time() - older_than))
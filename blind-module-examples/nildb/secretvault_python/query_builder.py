@@ -0,0 +1,100 @@
+"""Query builder that pushes credential filters and projections down to the nodes."""
+import json
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from nildb_api import FIELD_TYPES, QUERY_NAMESPACE, parameterize
+
+# Fields needed to list and decrypt credentials
+LISTING_FIELDS = ["username", "service", "password"]
+
+
+def _timestamp(value) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+class CredentialQuery:
+    """Fluent description of which credential records and fields to read.
+
+    Example:
+        CredentialQuery().service("Netflix").fields("username", "password")
+    """
+
+    def __init__(self):
+        self._filter: Dict = {}
+        self._fields: Optional[List[str]] = None
+
+    def where(self, field: str, value) -> "CredentialQuery":
+        """Match records whose field equals value."""
+        self._filter[field] = value
+        return self
+
+    def service(self, name: str) -> "CredentialQuery":
+        return self.where("service", name)
+
+    def ids(self, ids: Iterable[str]) -> "CredentialQuery":
+        """Match only the given record ids."""
+        self._filter["_id"] = {"$in": list(ids)}
+        return self._coerce("_id")
+
+    def created_between(self, start=None, end=None) -> "CredentialQuery":
+        """Match records whose node-assigned _created timestamp falls in [start, end)."""
+        return self._time_range("_created", start, end)
+
+    def updated_between(self, start=None, end=None) -> "CredentialQuery":
+        """Match records whose node-assigned _updated timestamp falls in [start, end)."""
+        return self._time_range("_updated", start, end)
+
+    def _time_range(self, field: str, start, end) -> "CredentialQuery":
+        condition = {}
+        if start is not None:
+            condition["$gte"] = _timestamp(start)
+        if end is not None:
+            condition["$lt"] = _timestamp(end)
+        if condition:
+            self._filter[field] = condition
+            self._coerce(field)
+        return self
+
+    def _coerce(self, field: str) -> "CredentialQuery":
+        """Have data/read compare field as the type the nodes store it as."""
+        self._filter.setdefault("$coerce", {})[field] = FIELD_TYPES[field]
+        return self
+
+    def fields(self, *names: str) -> "CredentialQuery":
+        """Return only these fields (plus _id) from the nodes."""
+        self._fields = list(names)
+        return self
+
+    def filter(self) -> Dict:
+        """Filter document for data_read."""
+        return dict(self._filter)
+
+    def projection(self) -> Optional[List[str]]:
+        return list(self._fields) if self._fields else None
+
+    def pipeline(self) -> List[Dict]:
+        """Aggregation pipeline equivalent of this query, with its filter values as ##fN variables."""
+        template, _, _ = parameterize(self.filter())
+        pipeline = [{"$match": template}]
+        if self._fields:
+            pipeline.append({"$project": {field: 1 for field in self._fields}})
+        return pipeline
+
+    def variables(self) -> Dict:
+        """Values for the pipeline's variables."""
+        _, values, _ = parameterize(self.filter())
+        return values
+
+    def query_payload(self, schema_id: str) -> Dict:
+        """Query definition for /api/v1/queries, with an id derived from its shape (not its values)."""
+        pipeline = self.pipeline()
+        _, _, declarations = parameterize(self.filter())
+        return {
+            "_id": str(uuid.uuid5(QUERY_NAMESPACE, json.dumps(["select", schema_id, pipeline], sort_keys=True))),
+            "name": "select",
+            "schema": schema_id,
+            "variables": declarations,
+            "pipeline": pipeline
+        }
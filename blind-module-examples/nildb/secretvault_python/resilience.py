@@ -0,0 +1,60 @@
+"""Failure isolation helpers for talking to nilDB nodes."""
+import threading
+import time
+
+
+class NodeUnavailableError(Exception):
+    """Raised instead of sending a request to a node whose circuit is open."""
+
+
+class NodeReadError(Exception):
+    """Raised when a node fails part way through a read, so a short read is never taken for the end of the data."""
+
+
+class CircuitBreaker:
+    """Stops sending requests to a node after repeated failures and probes it again later.
+
+    closed    -> requests flow; consecutive failures are counted
+    open      -> requests are skipped until reset_timeout has passed
+    half_open -> a single probe request is let through; its outcome closes or re-opens the circuit
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._probing or time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
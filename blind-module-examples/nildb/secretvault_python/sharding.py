@@ -0,0 +1,182 @@
+"""Consistent-hash routing of records across several independent nilDB clusters."""
+import bisect
+import copy
+import hashlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bulk_import import share_batch
+from encryption import DataEncryption
+from nildb_api import DEFAULT_PAGE_SIZE, ConcurrentNilDBAPI
+from share_join import ShareJoin
+
+# Ring positions per cluster; more points spread keys more evenly
+DEFAULT_VNODES = 128
+
+# Joined records buffered per cluster while reads are merged
+DEFAULT_MERGE_BUFFER = 1024
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes: adding or removing a cluster only moves the keys it owns."""
+
+    def __init__(self, names: Iterable[str] = (), vnodes: int = DEFAULT_VNODES):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        for name in names:
+            self.add(name)
+
+    def add(self, name: str) -> None:
+        for i in range(self.vnodes):
+            point = _hash(f"{name}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, name)
+
+    def remove(self, name: str) -> None:
+        kept = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != name]
+        self._points = [point for point, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def owner(self, key: str) -> str:
+        """Cluster owning key: the first ring point at or after the key's hash."""
+        if not self._points:
+            raise ValueError("hash ring is empty")
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+class ShardedVault:
+    """Spreads credential records over several clusters by consistent hashing on _id.
+
+    Each cluster has its own ConcurrentNilDBAPI and a DataEncryption sized to its node
+    count; a record lives entirely (all of its shares) in the cluster that owns its _id.
+    """
+
+    def __init__(self, clusters: Dict[str, object], encryptions: Dict[str, object],
+                 vnodes: int = DEFAULT_VNODES):
+        self.clusters = clusters
+        self.encryptions = encryptions
+        self.ring = HashRing(clusters, vnodes)
+        self.executor = ThreadPoolExecutor(max_workers=len(clusters), thread_name_prefix="shard")
+
+    def with_auth(self, auths: Dict[str, object]) -> "ShardedVault":
+        """View whose cluster clients authorize with the given per-cluster auth contexts."""
+        view = copy.copy(self)
+        view.clusters = {name: api.with_auth(auths[name]) for name, api in self.clusters.items()}
+        return view
+
+    def route(self, records: Iterable[Dict]) -> Dict[str, List[Dict]]:
+        """Group records by the cluster that owns their _id."""
+        routed = {}
+        for record in records:
+            routed.setdefault(self.ring.owner(record["_id"]), []).append(record)
+        return routed
+
+    def _upload_cluster(self, cluster: str, schema_id: str, records: List[Dict]) -> Dict[str, bool]:
+        api, encryption = self.clusters[cluster], self.encryptions[cluster]
+        share_columns = [[] for _ in api.nodes]
+        for columns in encryption.encrypt_many(record["password"] for record in records):
+            for target, column in zip(share_columns, columns):
+                target.extend(column)
+        node_payloads = share_batch(list(api.nodes), records, share_columns,
+                                    [encryption.match_tokens(record) for record in records])
+        return api.data_upload_all(schema_id, node_payloads)
+
+    def upload(self, schema_id: str, records: List[Dict]) -> Dict[str, Dict[str, bool]]:
+        """Secret-share plaintext records (with _id set) and write each to its cluster, clusters in parallel."""
+        futures = {
+            cluster: self.executor.submit(self._upload_cluster, cluster, schema_id, cluster_records)
+            for cluster, cluster_records in self.route(records).items()
+        }
+        return {cluster: future.result() for cluster, future in futures.items()}
+
+    def delete_ids(self, schema_id: str, record_ids: List[str]) -> Dict[str, Dict]:
+        """Delete records by id on the clusters that own them."""
+        routed = {}
+        for record_id in record_ids:
+            routed.setdefault(self.ring.owner(record_id), []).append(record_id)
+        futures = {
+            cluster: self.executor.submit(self.clusters[cluster].data_delete_ids_all, schema_id, ids)
+            for cluster, ids in routed.items()
+        }
+        return {cluster: future.result() for cluster, future in futures.items()}
+
+    def read_joined(self, schema_id: str,
+                    filter_dict: Optional[dict] = None,
+                    page_size: Optional[int] = DEFAULT_PAGE_SIZE,
+                    projection: Optional[List[str]] = None,
+                    buffer_size: int = DEFAULT_MERGE_BUFFER) -> Iterator[Tuple[str, str, List[Dict]]]:
+        """Yield (cluster, record_id, [record from each node]) from every cluster, read in parallel.
+
+        Records arrive in whatever order the clusters deliver them. A read error on any
+        cluster is re-raised here once that cluster's reader stops.
+        """
+        merged = queue.Queue(maxsize=buffer_size)
+        stop = threading.Event()
+        done = object()
+        failures = []
+
+        def drain(cluster: str) -> None:
+            try:
+                api = self.clusters[cluster]
+                for record_id, records in ShareJoin(api.data_read_streams(schema_id, filter_dict, page_size,
+                                                                          projection=projection)):
+                    while not stop.is_set():
+                        try:
+                            merged.put((cluster, record_id, records), timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        return
+            except Exception as e:
+                failures.append(e)
+            finally:
+                merged.put(done)
+
+        threads = [threading.Thread(target=drain, args=(cluster,), daemon=True) for cluster in self.clusters]
+        for thread in threads:
+            thread.start()
+        try:
+            remaining = len(threads)
+            while remaining:
+                item = merged.get()
+                if item is done:
+                    remaining -= 1
+                    if failures:
+                        raise failures[0]
+                    continue
+                yield item
+        finally:
+            stop.set()
+            # unblock producers still waiting to hand over their end marker
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    merged.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+
+def sharded_vault(clusters: Dict[str, Dict],
+                  vnodes: int = DEFAULT_VNODES,
+                  encryption_options: Optional[Dict] = None,
+                  **client_options) -> ShardedVault:
+    """Build a ShardedVault from cluster name -> node config (e.g. config.CLUSTERS).
+
+    encryption_options are passed to every cluster's DataEncryption, client_options to
+    every ConcurrentNilDBAPI.
+    """
+    encryption_options = encryption_options or {}
+    return ShardedVault(
+        {name: ConcurrentNilDBAPI(node_config, **client_options) for name, node_config in clusters.items()},
+        {name: DataEncryption(len(node_config), **encryption_options) for name, node_config in clusters.items()},
+        vnodes
+    )
@@ -0,0 +1,59 @@
+"""Streaming join of per-node record streams by _id."""
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+def batched(records: Iterable, size: int) -> Iterator[List]:
+    """Group an iterable into lists of at most size items."""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ShareJoin:
+    """Merges per-node record streams and emits each record once every node has sent its share.
+
+    Records wait in an in-flight table only until their last share arrives and are
+    evicted as soon as they are emitted, so memory grows with how far the node
+    streams drift apart rather than with the size of the collection.
+    """
+
+    def __init__(self, streams: Dict[str, Iterable[Dict]], key: str = "_id"):
+        self.node_names = list(streams.keys())
+        self.streams = streams
+        self.key = key
+        self.in_flight: Dict[str, Dict[str, Dict]] = {}
+        self.peak_in_flight = 0
+
+    def __iter__(self) -> Iterator[Tuple[str, List[Dict]]]:
+        """Yield (record_id, [record from each node, in node order]) for complete records."""
+        iterators = {node_name: iter(stream) for node_name, stream in self.streams.items()}
+        active = list(self.node_names)
+        num_nodes = len(self.node_names)
+
+        # Round-robin over the nodes so no single stream runs far ahead of the others
+        while active:
+            for node_name in list(active):
+                try:
+                    record = next(iterators[node_name])
+                except StopIteration:
+                    active.remove(node_name)
+                    continue
+
+                record_id = record[self.key]
+                parts = self.in_flight.setdefault(record_id, {})
+                parts[node_name] = record
+                if len(parts) == num_nodes:
+                    del self.in_flight[record_id]
+                    yield record_id, [parts[name] for name in self.node_names]
+                elif len(self.in_flight) > self.peak_in_flight:
+                    self.peak_in_flight = len(self.in_flight)
+
+    @property
+    def incomplete(self) -> List[str]:
+        """Ids still missing a share from at least one node (meaningful once iteration has finished)."""
+        return list(self.in_flight.keys())
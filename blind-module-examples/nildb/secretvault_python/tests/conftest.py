@@ -0,0 +1,29 @@
+"""Fixtures running the client against in-process simulated nilDB nodes."""
+import uuid
+
+import pytest
+
+from nildb_api import ConcurrentNilDBAPI
+from node_simulator import simulated_cluster
+
+SCHEMA_ID = "test-schema"
+
+NODE_NAMES = ["node_a", "node_b", "node_c"]
+
+
+def make_records(count: int, service: str = "service") -> list:
+    return [
+        {"_id": str(uuid.uuid4()), "username": f"user{i}", "password": f"share{i}", "service": f"{service}{i % 3}"}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def cluster():
+    """(simulated nodes, client) for a fresh three-node cluster."""
+    nodes, node_config = simulated_cluster(NODE_NAMES)
+    api = ConcurrentNilDBAPI(node_config)
+    yield nodes, api
+    api.close()
+    for node in nodes.values():
+        node.stop()
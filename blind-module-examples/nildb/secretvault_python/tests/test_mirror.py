@@ -0,0 +1,58 @@
+import pytest
+
+from conftest import SCHEMA_ID, make_records
+from mirror import ShareMirror
+from resilience import NodeReadError
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    mirror = ShareMirror(str(tmp_path / "mirror.db"))
+    yield mirror
+    mirror.close()
+
+
+def load(api, records):
+    api.data_upload_all(SCHEMA_ID, {node_name: records for node_name in api.nodes})
+
+
+def test_sync_mirrors_every_record_and_sets_the_mark(cluster, mirror):
+    _, api = cluster
+    records = make_records(30)
+    load(api, records)
+
+    assert mirror.sync(api, SCHEMA_ID, page_size=7) == {node_name: 30 for node_name in api.nodes}
+    assert mirror.high_water(SCHEMA_ID, "node_a") is not None
+    joined = list(mirror.iter_joined(SCHEMA_ID, list(api.nodes)))
+    assert sorted(record_id for record_id, _ in joined) == sorted(record["_id"] for record in records)
+
+
+def test_incremental_sync_picks_up_updates(cluster, mirror):
+    nodes, api = cluster
+    records = make_records(30)
+    load(api, records)
+    mirror.sync(api, SCHEMA_ID)
+    first_mark = mirror.high_water(SCHEMA_ID, "node_a")
+
+    changed = records[4]["_id"]
+    api.data_update("node_a", SCHEMA_ID, {"_id": changed, "$coerce": {"_id": "uuid"}}, {"$set": {"password": "new"}})
+    assert mirror.sync_node("node_a", api, SCHEMA_ID) >= 1
+    assert mirror.high_water(SCHEMA_ID, "node_a") > first_mark
+
+    joined = dict(mirror.iter_joined(SCHEMA_ID, list(api.nodes), {"_id": changed}))
+    assert joined[changed][0]["password"] == "new"
+    # later syncs reuse the same registered query
+    queries = len(nodes["node_a"].state.queries)
+    mirror.sync_node("node_a", api, SCHEMA_ID)
+    assert len(nodes["node_a"].state.queries) == queries
+
+
+def test_failed_sync_leaves_the_mark_in_place(cluster, mirror):
+    nodes, api = cluster
+    load(api, make_records(30))
+    nodes["node_b"].error_rate = 1.0
+
+    with pytest.raises(NodeReadError):
+        mirror.sync(api, SCHEMA_ID, page_size=10)
+    assert mirror.high_water(SCHEMA_ID, "node_b") is None
+    assert mirror.high_water(SCHEMA_ID, "node_a") is not None
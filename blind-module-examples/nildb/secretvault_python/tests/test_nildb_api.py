@@ -0,0 +1,86 @@
+import pytest
+
+from conftest import SCHEMA_ID, make_records
+from nildb_api import NilDBAPI, is_duplicate_error
+from resilience import NodeReadError
+from share_join import ShareJoin
+
+
+def load(api, records):
+    assert all(api.data_upload_all(SCHEMA_ID, {node_name: records for node_name in api.nodes}).values())
+
+
+def test_paged_read_returns_every_record_in_id_order(cluster):
+    _, api = cluster
+    records = make_records(250)
+    load(api, records)
+
+    pages = list(api.data_read_pages("node_a", SCHEMA_ID, page_size=100))
+    assert [len(page) for page in pages] == [100, 100, 50]
+    ids = [record["_id"] for page in pages for record in page]
+    assert ids == sorted(record["_id"] for record in records)
+
+
+def test_filters_of_one_shape_share_a_registered_query(cluster):
+    nodes, api = cluster
+    load(api, make_records(90))
+
+    first = list(api.data_read_iter("node_a", SCHEMA_ID, {"service": "service0"}, page_size=20))
+    second = list(api.data_read_iter("node_a", SCHEMA_ID, {"service": "service1"}, page_size=20))
+    assert len(first) == len(second) == 30
+    assert {record["service"] for record in first} == {"service0"}
+    assert len(nodes["node_a"].state.queries) == 1
+
+
+def test_id_and_timestamp_filters_compare_as_stored_types(cluster):
+    _, api = cluster
+    records = make_records(10)
+    load(api, records)
+
+    wanted = [records[0]["_id"], records[1]["_id"]]
+    by_id = list(api.data_read_iter("node_a", SCHEMA_ID, {"_id": {"$in": wanted}}))
+    assert sorted(record["_id"] for record in by_id) == sorted(wanted)
+
+    stamp = by_id[0]["_updated"]
+    assert len(list(api.data_read_iter("node_a", SCHEMA_ID, {"_updated": {"$gte": stamp}}))) == 10
+
+
+def test_failed_page_raises_instead_of_ending_the_read(cluster):
+    nodes, api = cluster
+    load(api, make_records(50))
+    nodes["node_b"].error_rate = 1.0
+
+    with pytest.raises(NodeReadError):
+        list(api.data_read_iter("node_b", SCHEMA_ID, page_size=10))
+    with pytest.raises(NodeReadError):
+        list(ShareJoin(api.data_read_streams(SCHEMA_ID, page_size=10)))
+
+
+def test_duplicate_key_counts_as_stored(cluster):
+    _, api = cluster
+    records = make_records(3)
+    load(api, records)
+    assert api.data_upload("node_a", SCHEMA_ID, records)
+
+
+def test_rejection_mentioning_duplicate_in_the_document_is_not_stored(cluster):
+    _, api = cluster
+    # rejected for lacking an _id; the echoed document must not make it look like a duplicate
+    assert not api.data_upload("node_a", SCHEMA_ID, [{"username": "duplicate-finder", "password": "x", "service": "s"}])
+
+
+def test_is_duplicate_error_only_reads_the_message():
+    assert is_duplicate_error({"error": "E11000 duplicate key error", "document": {}})
+    assert is_duplicate_error("duplicate key: query already exists")
+    assert not is_duplicate_error({"error": "_id must be a uuid", "document": {"username": "duplicate"}})
+
+
+def test_query_registered_before_a_restart_is_reused(cluster):
+    nodes, api = cluster
+    load(api, make_records(5))
+    list(api.data_read_iter("node_a", SCHEMA_ID))
+
+    restarted = NilDBAPI(api.nodes)
+    assert len(list(restarted.data_read_iter("node_a", SCHEMA_ID))) == 5
+    assert len(restarted._registered_queries) == 1
+    assert len(nodes["node_a"].state.queries) == 1
@@ -0,0 +1,79 @@
+import pytest
+
+from conftest import SCHEMA_ID, make_records
+from outbox import ACKED, FAILED, PENDING, Outbox
+
+
+@pytest.fixture
+def outbox(cluster, tmp_path):
+    _, api = cluster
+    acked = []
+    box = Outbox(api, str(tmp_path / "outbox.db"), max_attempts=2,
+                 on_acked=lambda schema_id, node_name, ids: acked.append((node_name, sorted(ids))))
+    box.acked_calls = acked
+    yield box
+    box.conn.close()
+
+
+def enqueue(outbox, records):
+    outbox.enqueue(SCHEMA_ID, {node_name: records for node_name in outbox.nildb_api.nodes})
+
+
+def retry_now(outbox):
+    with outbox.conn:
+        outbox.conn.execute("UPDATE outbox SET next_attempt = 0")
+
+
+def test_delivered_writes_are_acked_and_reported(cluster, outbox):
+    nodes, _ = cluster
+    records = make_records(4)
+    enqueue(outbox, records)
+
+    assert outbox.flush_once() == {node_name: 4 for node_name in nodes}
+    assert outbox.status(records[0]["_id"]) == {node_name: ACKED for node_name in nodes}
+    assert outbox.summary() == {}
+    assert all(len(node.state.data[SCHEMA_ID]) == 4 for node in nodes.values())
+    ids = sorted(record["_id"] for record in records)
+    assert sorted(outbox.acked_calls) == [(node_name, ids) for node_name in sorted(nodes)]
+
+
+def test_records_a_node_already_holds_are_acked(cluster, outbox):
+    _, api = cluster
+    records = make_records(2)
+    api.data_upload("node_a", SCHEMA_ID, records)
+    enqueue(outbox, records)
+
+    outbox.flush_once()
+    assert outbox.status(records[0]["_id"])["node_a"] == ACKED
+
+
+def test_failing_node_is_retried_then_marked_failed(cluster, outbox):
+    nodes, _ = cluster
+    records = make_records(2)
+    nodes["node_c"].error_rate = 1.0
+    enqueue(outbox, records)
+
+    delivered = outbox.flush_once()
+    assert delivered["node_c"] == 0
+    assert outbox.status(records[0]["_id"]) == {"node_a": ACKED, "node_b": ACKED, "node_c": PENDING}
+    assert outbox.summary() == {"node_c": {PENDING: 2}}
+
+    retry_now(outbox)
+    outbox.flush_once()
+    assert outbox.summary() == {"node_c": {FAILED: 2}}
+
+    # failed rows are no longer retried, even once the node recovers
+    nodes["node_c"].error_rate = 0.0
+    retry_now(outbox)
+    assert outbox.flush_once()["node_c"] == 0
+
+
+def test_purge_drops_only_old_acked_rows(cluster, outbox):
+    nodes, _ = cluster
+    nodes["node_c"].error_rate = 1.0
+    enqueue(outbox, make_records(1))
+    outbox.flush_once()
+
+    outbox.purge_acked(older_than=-1)
+    statuses = outbox.conn.execute("SELECT node, status FROM outbox").fetchall()
+    assert statuses == [("node_c", PENDING)]
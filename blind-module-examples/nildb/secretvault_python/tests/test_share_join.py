@@ -0,0 +1,36 @@
+import pytest
+
+from share_join import ShareJoin, batched
+
+
+def test_joins_records_once_every_node_has_sent_its_share():
+    streams = {
+        "a": [{"_id": "1", "v": "a1"}, {"_id": "2", "v": "a2"}],
+        "b": [{"_id": "2", "v": "b2"}, {"_id": "1", "v": "b1"}],
+    }
+    joined = dict(ShareJoin(streams))
+    assert joined == {
+        "1": [{"_id": "1", "v": "a1"}, {"_id": "1", "v": "b1"}],
+        "2": [{"_id": "2", "v": "a2"}, {"_id": "2", "v": "b2"}],
+    }
+
+
+def test_records_missing_a_share_are_reported_incomplete():
+    join = ShareJoin({"a": [{"_id": "1"}, {"_id": "2"}], "b": [{"_id": "1"}]})
+    assert [record_id for record_id, _ in join] == ["1"]
+    assert join.incomplete == ["2"]
+
+
+def test_stream_errors_propagate():
+    def failing():
+        yield {"_id": "1"}
+        raise RuntimeError("node went away")
+
+    join = ShareJoin({"a": failing(), "b": [{"_id": "1"}, {"_id": "2"}]})
+    with pytest.raises(RuntimeError):
+        list(join)
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 2)) == []
@@ -0,0 +1,151 @@
+"""Pooled keep-alive HTTP transport for nilDB nodes."""
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterator, Optional
+
+import codec
+import fastjson
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class NodeTransport:
+    """Keeps a pool of persistent connections open to a single node."""
+
+    def __init__(self, base_url: str,
+                 pool_connections: int = 1,
+                 pool_maxsize: int = 10,
+                 http2: bool = False,
+                 compression: Optional[str] = None):
+        self.base_url = base_url.rstrip('/')
+        self.http2 = http2
+        self.compression = compression
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._connections = 0
+        self._bytes = {}
+
+        if http2:
+            if httpx is None:
+                raise ImportError("HTTP/2 transport requires httpx (pip install 'httpx[http2]')")
+            self.client = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=pool_maxsize,
+                    max_keepalive_connections=pool_maxsize
+                )
+            )
+        else:
+            self.client = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+            self.client.mount("https://", adapter)
+            self.client.mount("http://", adapter)
+
+    def _trace(self, event_name: str, info: dict) -> None:
+        """httpcore trace hook used to count new connections on the HTTP/2 client."""
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._connections += 1
+
+    def _encode(self, headers: Dict, json: Optional[dict]) -> tuple:
+        """Serialize (and optionally compress) a JSON body, returning (headers, body)."""
+        headers = dict(headers)
+        headers['Content-Type'] = 'application/json'
+        headers['Accept-Encoding'] = ", ".join(codec.supported_compressions())
+        body = fastjson.dumps(json) if json is not None else b""
+        if self.compression:
+            body = codec.compress(body, self.compression)
+            headers['Content-Encoding'] = self.compression
+        return headers, body
+
+    def _record(self, path: str, sent: int, response, stream: bool = False) -> None:
+        content_length = response.headers.get('Content-Length')
+        if content_length is not None:
+            received = int(content_length)
+        else:
+            # a streamed body of unknown length is not read here, so it is not counted
+            received = 0 if stream else len(response.content)
+        with self._lock:
+            counters = self._bytes.setdefault(path, {"calls": 0, "bytes_sent": 0, "bytes_received": 0})
+            counters["calls"] += 1
+            counters["bytes_sent"] += sent
+            counters["bytes_received"] += received
+        # per-call figures for callers that want them
+        response.wire_bytes = {"sent": sent, "received": received}
+
+    def post(self, path: str, headers: Dict, json: Optional[dict] = None, timeout: Optional[float] = None,
+             stream: bool = False):
+        """POST to a path on this node, reusing a pooled connection when one is idle.
+
+        With stream=True the body is left unread so iter_records() can parse it incrementally
+        (the HTTP/2 client always reads the full body).
+        """
+        with self._lock:
+            self._requests += 1
+        url = f"{self.base_url}{path}"
+        headers, body = self._encode(headers, json)
+        if self.http2:
+            response = self.client.post(url, headers=headers, content=body, timeout=timeout,
+                                        extensions={"trace": self._trace})
+            stream = False
+        else:
+            response = self.client.post(url, headers=headers, data=body, timeout=timeout, stream=stream)
+        self._record(path, len(body), response, stream)
+        return response
+
+    @staticmethod
+    def iter_records(response, prefix: str = "data.item") -> Iterator:
+        """Yield records from a response body as they are parsed, releasing the connection afterwards."""
+        try:
+            raw = getattr(response, "raw", None)
+            if raw is not None and not getattr(response, "_content_consumed", True):
+                raw.decode_content = True
+                yield from fastjson.iter_items(raw, prefix)
+            else:
+                yield from fastjson.iter_items(_BytesStream(response.content), prefix)
+        finally:
+            response.close()
+
+    def stats(self) -> Dict:
+        """Report requests sent, connection reuse and bytes on the wire per endpoint."""
+        with self._lock:
+            requests_sent = self._requests
+            connections = self._connections
+            wire = {path: dict(counters) for path, counters in self._bytes.items()}
+        if not self.http2:
+            connections = 0
+            for adapter in set(self.client.adapters.values()):
+                for key in adapter.poolmanager.pools.keys():
+                    connections += adapter.poolmanager.pools[key].num_connections
+        reused = max(requests_sent - connections, 0)
+        return {
+            "requests": requests_sent,
+            "connections": connections,
+            "reused": reused,
+            "reuse_ratio": reused / requests_sent if requests_sent else 0.0,
+            "http2": self.http2,
+            "compression": self.compression,
+            "bytes": wire
+        }
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class _BytesStream:
+    """Minimal file-like wrapper so already-read bodies go through the same parser."""
+
+    def __init__(self, data: bytes):
+        self._data = data
+        self._offset = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = len(self._data) - self._offset
+        chunk = self._data[self._offset:self._offset + size]
+        self._offset += len(chunk)
+        return chunk
@@ -0,0 +1,96 @@
+"""Local validation of record batches against schema.json before they are uploaded."""
+import json
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+DEFAULT_SCHEMA_PATH = "schema.json"
+
+UUID_PATTERN = r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+
+# JSON schema types checked per value
+_TYPES = {
+    "string": lambda value: isinstance(value, str),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+}
+
+
+class SchemaValidator:
+    """schema.json compiled into column checks that run over a whole batch at once.
+
+    Covers the keywords the collection schemas use (required, additionalProperties, type,
+    format uuid, enum, minLength, maxLength, pattern); anything else is left to the nodes.
+    """
+
+    def __init__(self, schema: Dict):
+        items = schema.get("items", schema)
+        self.properties: Dict[str, Dict] = items.get("properties", {})
+        self.required: List[str] = list(items.get("required", []))
+        self.additional = items.get("additionalProperties", True)
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_SCHEMA_PATH) -> "SchemaValidator":
+        with open(path, "r") as file:
+            return cls(json.load(file))
+
+    def _column_errors(self, field: str, spec: Dict, column: pd.Series) -> List[Tuple[pd.Series, str]]:
+        """(failing-row mask, message) pairs for one property, evaluated over present values."""
+        present = column.notna()
+        checks = []
+        if spec.get("type") in _TYPES:
+            is_type = column.map(_TYPES[spec["type"]]).astype(bool)
+            checks.append((present & ~is_type, f"{field}: expected {spec['type']}"))
+            present = present & is_type
+        if spec.get("type") == "string":
+            text = column.where(present, "").astype(str)
+            if spec.get("format") == "uuid":
+                checks.append((present & ~text.str.fullmatch(UUID_PATTERN).astype(bool), f"{field}: not a uuid"))
+            if "pattern" in spec:
+                matched = text.str.contains(spec["pattern"], regex=True).astype(bool)
+                checks.append((present & ~matched, f"{field}: does not match pattern"))
+            if "minLength" in spec:
+                checks.append((present & (text.str.len() < spec["minLength"]), f"{field}: shorter than {spec['minLength']}"))
+            if "maxLength" in spec:
+                checks.append((present & (text.str.len() > spec["maxLength"]), f"{field}: longer than {spec['maxLength']}"))
+        if "enum" in spec:
+            checks.append((present & ~column.isin(spec["enum"]), f"{field}: not one of {spec['enum']}"))
+        return checks
+
+    def validate(self, records: List[Dict]) -> Tuple[List[Dict], List[Tuple[Dict, List[str]]]]:
+        """Split a batch into (valid records, [(invalid record, error messages)])."""
+        if not records:
+            return [], []
+        # object dtype keeps the original Python values, so type checks see what will be sent
+        frame = pd.DataFrame(records, dtype=object)
+        failures: List[Tuple[pd.Series, str]] = []
+
+        for field in self.required:
+            if field in frame:
+                failures.append((frame[field].isna(), f"{field}: required"))
+            else:
+                failures.append((pd.Series(True, index=frame.index), f"{field}: required"))
+        for field, spec in self.properties.items():
+            if field in frame:
+                failures.extend(self._column_errors(field, spec, frame[field]))
+        if self.additional is False:
+            for field in frame.columns:
+                if field not in self.properties:
+                    failures.append((frame[field].notna(), f"{field}: not allowed"))
+
+        if not failures:
+            return list(records), []
+        invalid_rows = pd.concat([mask for mask, _ in failures], axis=1).any(axis=1)
+        if not invalid_rows.any():
+            return list(records), []
+
+        valid, invalid = [], []
+        for position, (record, bad) in enumerate(zip(records, invalid_rows)):
+            if bad:
+                invalid.append((record, [message for mask, message in failures if mask.iat[position]]))
+            else:
+                valid.append(record)
+        return valid, invalid
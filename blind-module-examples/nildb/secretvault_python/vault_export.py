@@ -0,0 +1,205 @@
+"""Streaming vault export/import to Parquet or Arrow IPC files.
+
+    python3 vault_export.py export vault.parquet               # per-node shares
+    python3 vault_export.py export vault.parquet --decrypt     # plaintext passwords (explicit opt-in)
+    python3 vault_export.py import vault.parquet
+
+Requires pyarrow (pip install pyarrow).
+"""
+import argparse
+import json
+from typing import Dict, Iterator, List, Optional
+
+from config import NODE_CONFIG, SCHEMA_ID, SHARE_ENCODING, COMPRESSION, MATCH_FIELDS, MATCH_SEED
+import generate_tokens
+from bulk_import import ImportReport, share_batch, upload_node_payloads
+from encryption import DataEncryption
+from nildb_api import ConcurrentNilDBAPI
+from resilience import NodeReadError
+from share_join import ShareJoin, batched
+
+# Rows per Parquet row group / Arrow record batch
+DEFAULT_ROW_GROUP_SIZE = 50000
+
+SHARE_PREFIX = "share_"
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("vault export/import requires pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def _is_arrow(path: str) -> bool:
+    return path.endswith(".arrow") or path.endswith(".feather")
+
+
+class _Writer:
+    """Writes record batches to Parquet row groups or an Arrow IPC file, chosen by extension."""
+
+    def __init__(self, path: str, schema):
+        pa = _pyarrow()
+        if _is_arrow(path):
+            self.writer = pa.ipc.new_file(path, schema)
+        else:
+            self.writer = pa.parquet.ParquetWriter(path, schema, compression="zstd")
+
+    def write(self, table) -> None:
+        self.writer.write_table(table)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def _read_batches(path: str, batch_size: int) -> Iterator:
+    pa = _pyarrow()
+    if _is_arrow(path):
+        with pa.memory_map(path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+    else:
+        yield from pa.parquet.ParquetFile(path).iter_batches(batch_size=batch_size)
+
+
+def export_vault(path: str,
+                 nildb_api: Optional[ConcurrentNilDBAPI] = None,
+                 encryption: Optional[DataEncryption] = None,
+                 schema_id: str = SCHEMA_ID,
+                 decrypt: bool = False,
+                 row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> Dict[str, int]:
+    """Stream every complete record into a columnar file, one bounded row group at a time.
+
+    By default each node's share is written to its own share_<node> column, so the file is
+    as safe as the vault itself. decrypt=True writes plaintext passwords instead; records
+    that fail to decrypt are left out and counted as undecryptable.
+
+    Raises NodeReadError if a node read fails and ValueError if any record is missing a
+    share, since the file would silently lack those records.
+    """
+    pa = _pyarrow()
+    nildb_api = nildb_api or ConcurrentNilDBAPI(NODE_CONFIG, compression=COMPRESSION).with_auth(
+        generate_tokens.auth_context())
+    node_names = list(nildb_api.nodes.keys())
+    if decrypt:
+        encryption = encryption or DataEncryption(len(nildb_api.nodes), share_encoding=SHARE_ENCODING,
+                                                  match_fields=MATCH_FIELDS, match_seed=MATCH_SEED)
+        value_columns = ["password"]
+    else:
+        value_columns = [SHARE_PREFIX + node_name for node_name in node_names]
+    schema = pa.schema([(name, pa.string()) for name in ["_id", "username", "service"] + value_columns])
+
+    join = ShareJoin(nildb_api.data_read_streams(schema_id))
+    writer = _Writer(path, schema)
+    written, undecryptable = 0, 0
+    try:
+        for batch in batched(join, row_group_size):
+            if decrypt:
+                results = encryption.decrypt_many([[record["password"] for record in records] for _, records in batch])
+                decrypted, passwords = [], []
+                for (cred_id, records), (password, error) in zip(batch, results):
+                    if error is not None:
+                        print(f"Could not decrypt credentials {cred_id}: {error}")
+                        undecryptable += 1
+                        continue
+                    decrypted.append((cred_id, records))
+                    passwords.append(password)
+                batch = decrypted
+            columns = {
+                "_id": [cred_id for cred_id, _ in batch],
+                "username": [records[0]["username"] for _, records in batch],
+                "service": [records[0]["service"] for _, records in batch],
+            }
+            if decrypt:
+                columns["password"] = passwords
+            else:
+                for i, node_name in enumerate(node_names):
+                    columns[SHARE_PREFIX + node_name] = [records[i]["password"] for _, records in batch]
+            writer.write(pa.table(columns, schema=schema))
+            written += len(batch)
+            print(f"Exported {written} records")
+    finally:
+        writer.close()
+    if join.incomplete:
+        raise ValueError(f"{len(join.incomplete)} records are missing a share on at least one node; export is incomplete")
+    return {"exported": written, "undecryptable": undecryptable}
+
+
+def import_vault(path: str,
+                 nildb_api: Optional[ConcurrentNilDBAPI] = None,
+                 encryption: Optional[DataEncryption] = None,
+                 schema_id: str = SCHEMA_ID,
+                 batch_size: int = DEFAULT_ROW_GROUP_SIZE) -> ImportReport:
+    """Load an exported file back through the bulk uploader.
+
+    Share exports are uploaded as-is (each share_<node> column to its node); plaintext
+    exports are secret-shared again first. Match tokens are recomputed from the plaintext fields.
+    Rows with a missing password or share are skipped and counted as invalid.
+    """
+    nildb_api = nildb_api or ConcurrentNilDBAPI(NODE_CONFIG, compression=COMPRESSION).with_auth(
+        generate_tokens.auth_context())
+    encryption = encryption or DataEncryption(len(nildb_api.nodes), share_encoding=SHARE_ENCODING,
+                                              match_fields=MATCH_FIELDS, match_seed=MATCH_SEED)
+    node_names = list(nildb_api.nodes.keys())
+    report = ImportReport()
+
+    for record_batch in _read_batches(path, batch_size):
+        rows = record_batch.to_pydict()
+        if "password" in rows:
+            value_columns = ["password"]
+        else:
+            value_columns = [SHARE_PREFIX + node_name for node_name in node_names]
+            missing = [column for column in value_columns if column not in rows]
+            if missing:
+                raise ValueError(f"Export has no share columns for {', '.join(missing)}")
+
+        # e.g. rows written by an older export that stored failed decryptions as null
+        present = [i for i in range(len(rows["_id"])) if all(rows[column][i] is not None for column in value_columns)]
+        report.invalid += len(rows["_id"]) - len(present)
+        if not present:
+            continue
+        records = [
+            {"_id": rows["_id"][i], "username": rows["username"][i], "service": rows["service"][i]}
+            for i in present
+        ]
+
+        if "password" in rows:
+            share_columns: List[List[str]] = [[] for _ in node_names]
+            for columns in encryption.encrypt_many(rows["password"][i] for i in present):
+                for target, column in zip(share_columns, columns):
+                    target.extend(column)
+        else:
+            share_columns = [[rows[column][i] for i in present] for column in value_columns]
+
+        node_payloads = share_batch(node_names, records, share_columns,
+                                    [encryption.match_tokens(record) for record in records])
+        upload_node_payloads(nildb_api, schema_id, node_payloads, report)
+        print(report)
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import a SecretVault collection as Parquet/Arrow")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help=".parquet, or .arrow/.feather for Arrow IPC")
+    parser.add_argument("--decrypt", action="store_true",
+                        help="export plaintext passwords instead of per-node shares")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        try:
+            summary = export_vault(args.path, decrypt=args.decrypt, row_group_size=args.row_group_size)
+        except (NodeReadError, ValueError) as e:
+            parser.exit(1, f"Export failed: {str(e)}\n")
+        print(json.dumps(summary))
+        if summary["undecryptable"]:
+            parser.exit(1, f"{summary['undecryptable']} records could not be decrypted and were not exported\n")
+    else:
+        report = import_vault(args.path, batch_size=args.row_group_size)
+        print(json.dumps(report.as_dict()))